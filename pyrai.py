@@ -12,50 +12,104 @@
 #    "DAE58DB4087564DD1E3B32C2E301A9F288F2F006A31951816AB36E92F2A61548": "0000000000000000000000000000000000000000000000000000000100000001"   # Account 1: xrb_3pq7jpt1ixd6unh5pep4we1tmwnaydr1farsc81poeugkdsce7cain19myin
 #}
 
+import os
 import sys
+import argparse
+import itertools
+import json
+import mmap
+import time
+import queue
+import struct
+import re
+import string
 import random
+import sqlite3
 import base64
+import platform
+import statistics
+import asyncio
 import binascii
-from pyblake2 import blake2b
+import functools
+import threading
+import collections
+import multiprocessing
+import concurrent.futures
+from pure25519.hashing import blake2b
 from bitstring import BitArray
+from pure25519 import eddsa
 from pure25519 import ed25519_oop as ed25519
-from timeit import Timer
 
 # set global translation maps for base32
 RFC_3548 = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
 ENCODING = b"13456789abcdefghijkmnopqrstuwxyz"
+XRB_TRANSLATE = bytes.maketrans(RFC_3548, ENCODING)
+XRB_ALPHABET = ENCODING + b'?'*224													# maps 5-bit values 0..31 straight to address characters
+XRB_UNTRANSLATE = bytes.maketrans(ENCODING, RFC_3548)
+XRB_VALUES = bytes.maketrans(ENCODING, bytes(range(32)))								# address characters straight to 5-bit values
+
+# work is valid when blake2b(nonce + root) read as a little-endian uint64 exceeds this
+POW_THRESHOLD = 0xFFFFFFC000000000
+NONCE_SPACE = 1 << 64
+_NONCE = struct.Struct('<Q')
+_INDEX = struct.Struct('>I')																# account index as hashed by seed_account
+POW_RECORD = 40																		# raw work (8 bytes, little-endian) followed by root (32 bytes)
+
+# easier threshold for benchmarks, ~65k attempts per solve so short runs still collect enough samples
+BENCH_THRESHOLD = 0xFFFF000000000000
+
+# keys encoded per big-integer pass in account_xrb_many, keeps the integers small enough to stay in cache
+XRB_BATCH = 1024
+
+# number of PoW attempts a parallel worker makes between checks of the shared stop flag
+POW_CHECK_INTERVAL = 4096
 
 def xrb_account(address):
 	# Given a string containing an XRB address, confirm validity and provide resulting hex address
-	if len(address) == 64 and (address[:4] == 'xrb_'):
-		account_map = "13456789abcdefghijkmnopqrstuwxyz"				# each index = binary value, account_lookup[0] == '1'
-		account_lookup = {}
-		for i in range(0,32):											# populate lookup index with prebuilt bitarrays ready to append
-			account_lookup[account_map[i]] = BitArray(uint=i,length=5)
-
-		acrop_key = address[4:-8]										# we want everything after 'xrb_' but before the 8-char checksum
-		acrop_check = address[-8:]										# extract checksum
-			
-		# convert base-32 (5-bit) values to byte string by appending each 5-bit value to the bitstring, essentially bitshifting << 5 and then adding the 5-bit value.
-		number_l = BitArray()									
-		for x in range(0, len(acrop_key)):	
-			number_l.append(account_lookup[acrop_key[x]])		
-		number_l = number_l[4:]											# reduce from 260 to 256 bit (upper 4 bits are never used as account is a uint256)
-			
-		check_l = BitArray()
-		for x in range(0, len(acrop_check)):
-			check_l.append(account_lookup[acrop_check[x]])
-		check_l.byteswap()												# reverse byte order to match hashing format
-
-		result = number_l.hex.upper()
-
-		# verify checksum
-		h = blake2b(digest_size=5)
-		h.update(number_l.bytes)
-		if (h.hexdigest() == check_l.hex):return result
+	try:
+		return xrb_account_bytes(address).hex().upper()
+	except ValueError:
 		return False
-	return False
-	
+
+def xrb_account_bytes(address):
+	# Given an address as str or bytes, confirm validity and return the raw 32-byte public key, raises ValueError if invalid
+	# mirror image of account_xrb_bytes: translate to RFC 3548, restore the 4 leading characters it snips off and b32decode
+	if isinstance(address, str): address = address.encode()
+	if len(address) != 64 or address[:4] != b'xrb_': raise ValueError("not an xrb_ address")
+	encoded = address[4:]
+	if encoded.translate(None, ENCODING): raise ValueError("invalid character in address")
+	decoded = base64.b32decode(b'AAAA'+encoded.translate(XRB_UNTRANSLATE))
+	if decoded[:3] != b'\x00\x00\x00': raise ValueError("address is out of range")		# upper 4 bits of the first character must be zero
+	account = decoded[3:35]
+	h = blake2b(digest_size=5)
+	h.update(account)
+	if h.digest() != decoded[35:][::-1]: raise ValueError("address checksum mismatch")
+	return account
+
+def xrb_account_many(addresses):
+	# Given a list of addresses as str or bytes, return a list of their raw 32-byte public keys with None for each invalid one
+	# the inverse of account_xrb_many: character values are packed back into bytes with the same mask and shift steps, reversed
+	fresh = blake2b(digest_size=5).copy
+	result = []
+	for start in range(0, len(addresses), XRB_BATCH):
+		batch = [a.encode() if isinstance(a, str) else bytes(a) for a in addresses[start:start+XRB_BATCH]]
+		valid = [len(a) == 64 and a[:4] == b'xrb_' and not a[4:].translate(None, ENCODING) for a in batch]
+		digits = b''.join([b'1111'+a[4:] if ok else b'1'*64 for a, ok in zip(batch, valid)]).translate(XRB_VALUES)
+		m = int.from_bytes(digits, 'big')
+		for lo, hi, shift in reversed(_xrb_spread_masks(len(batch))):
+			m = (m & lo) | ((m >> shift) & hi)
+		decoded = m.to_bytes(len(digits), 'big')
+		o = 24																		# a 64-byte slot holds 24 bytes of padding then the 40-byte record
+		for ok in valid:
+			account = None
+			if ok and decoded[o:o+3] == b'\x00\x00\x00':
+				h = fresh()
+				h.update(decoded[o+3:o+35])
+				if h.digest() == decoded[o+35:o+40][::-1]: account = decoded[o+3:o+35]
+			result.append(account)
+			o += 64
+	return result
+
 def account_xrb(account):
 	# Given a string containing a public key, encode to public address format with checksum
     # ~50x faster than old method
@@ -65,7 +119,7 @@ def account_xrb(account):
     checksum = h.digest()
     account = b'\x00\x00\x00'+account+checksum[::-1]                                    # prefix account to make it even length for base32, add checksum in reverse byte order
     encode_account = base64.b32encode(account)                                          # use the optimized base32 lib to speed this up
-    encode_account = encode_account.translate(bytes.maketrans(RFC_3548,ENCODING))[4:]   # simply translate the result from RFC3548 to Nano's encoding, snip off the leading useless bytes
+    encode_account = encode_account.translate(XRB_TRANSLATE)[4:]                    # simply translate the result from RFC3548 to Nano's encoding, snip off the leading useless bytes
     return 'xrb_'+encode_account.decode()                                               # add prefix and return
     
 def account_xrb_bytes(account):
@@ -77,9 +131,155 @@ def account_xrb_bytes(account):
     checksum = h.digest()
     account = b'\x00\x00\x00'+account+checksum[::-1]                                    # prefix account to make it even length for base32, add checksum in reverse byte order
     encode_account = base64.b32encode(account)                                          # use the optimized base32 lib to speed this up
-    encode_account = encode_account.translate(bytes.maketrans(RFC_3548,ENCODING))[4:]   # simply translate the result from RFC3548 to Nano's encoding, snip off the leading useless bytes
+    encode_account = encode_account.translate(XRB_TRANSLATE)[4:]                    # simply translate the result from RFC3548 to Nano's encoding, snip off the leading useless bytes
     return b'xrb_'+encode_account                                                       # add prefix and return
 
+@functools.lru_cache(maxsize=8)
+def _xrb_spread_masks(slots):
+	# Masks for spreading 5-bit groups out to one group per byte across slots 64-byte slots at once
+	# each slot holds a 40-byte (320-bit) record right-aligned, every step splits each value in half and shifts the upper half up,
+	# so after six steps the 64 groups of 5 bits sit in the low bits of the slot's 64 bytes
+	masks = []
+	for size in (512, 256, 128, 64, 32, 16):
+		half = size*5//16															# half the width of the value in each size-bit slot
+		lo = ((1 << half) - 1).to_bytes(size//8, 'big') * (slots*512//size)
+		hi = (((1 << half) - 1) << half).to_bytes(size//8, 'big') * (slots*512//size)
+		masks.append((int.from_bytes(lo, 'big'), int.from_bytes(hi, 'big'), size//2 - half))
+	return masks
+
+def account_xrb_many(accounts):
+	# Given a list of bytestring public keys, or one contiguous buffer of them, encode them all to addresses in one pass
+	# base64.b32encode is a pure python loop, so instead every padded record (3 zero bytes, key, 5 byte checksum) is placed
+	# in a 64-byte slot and the whole batch is base32 split with a handful of big-integer mask and shift operations
+	if isinstance(accounts, (bytes, bytearray, memoryview)):
+		view = memoryview(accounts)
+		if len(view) % 32: raise ValueError("buffer length is not a multiple of 32")
+		accounts = [view[i:i+32] for i in range(0, len(view), 32)]
+	fresh = blake2b(digest_size=5).copy
+	result = []
+	for start in range(0, len(accounts), XRB_BATCH):
+		batch = accounts[start:start+XRB_BATCH]
+		records = bytearray(64 * len(batch))
+		o = 27																		# 24 bytes of slot padding, then the 3 zero bytes of the record
+		for i, account in enumerate(batch, start):
+			if len(account) != 32: raise ValueError("public key %d is %d bytes, not 32" % (i, len(account)))	# a short or long key would shift every record after it
+			h = fresh()
+			h.update(account)
+			records[o:o+32] = account
+			records[o+32:o+37] = h.digest()[::-1]
+			o += 64
+		m = int.from_bytes(records, 'big')
+		for lo, hi, shift in _xrb_spread_masks(len(batch)):
+			m = (m & lo) | ((m & hi) << shift)
+		encoded = m.to_bytes(len(records), 'big').translate(XRB_ALPHABET)
+		result.extend([b'xrb_'+encoded[o+4:o+64] for o in range(0, len(encoded), 64)])
+	return result
+
+class AccountIndex(object):
+	# Preloaded two-way map of address <-> public key, looked up in O(1) with no decoding or checksum work
+	def __init__(self, keys=()):
+		self._keys = {}																# address bytes -> key
+		self._addresses = {}														# key -> address bytes
+		self.add_keys(keys)
+
+	@classmethod
+	def from_file(cls, path):
+		# Build from a text file with one xrb_ address or 64-character hex public key per line
+		index = cls()
+		with open(path) as f:
+			lines = [line.strip() for line in f]
+		keys = []
+		addresses = []
+		for line in lines:
+			if not line: continue
+			if line.startswith('xrb_'):
+				addresses.append(line)
+				continue
+			try: key = bytes.fromhex(line)
+			except ValueError: key = None
+			if key is None or len(key) != 32:
+				raise ValueError("invalid public key in %s: %s" % (path, line))
+			keys.append(key)
+		decoded = xrb_account_many(addresses)
+		if None in decoded:
+			raise ValueError("invalid address in %s: %s" % (path, addresses[decoded.index(None)]))
+		index.add_keys(keys + decoded)
+		return index
+
+	def add_keys(self, keys):
+		keys = [bytes(k) for k in keys]
+		for key in keys:
+			if len(key) != 32: raise ValueError("invalid public key: %s" % key.hex())
+		for key, address in zip(keys, account_xrb_many(keys)):
+			self._keys[address] = key
+			self._addresses[key] = address
+
+	def key(self, address):
+		# Public key for address, or None if it is not indexed
+		if isinstance(address, str): address = address.encode()
+		return self._keys.get(address)
+
+	def address(self, key):
+		# Address (bytes) for a public key, or None if it is not indexed
+		return self._addresses.get(bytes(key))
+
+	def __len__(self):
+		return len(self._keys)
+
+	def __contains__(self, address):
+		return self.key(address) is not None
+
+class AddressCache(object):
+	# Bounded, thread-safe LRU of address -> public key in front of xrb_account_bytes, for addresses decoded over and over
+	# an optional AccountIndex is consulted first, addresses found there are never decoded or cached
+	def __init__(self, size=65536, index=None):
+		if size < 1: raise ValueError("size must be at least 1")
+		self.size = size
+		self.index = index
+		self.hits = 0
+		self.misses = 0
+		self._keys = collections.OrderedDict()
+		self._lock = threading.Lock()
+
+	def decode(self, address):
+		# Same contract as xrb_account_bytes: the raw 32-byte key, or ValueError for an invalid address
+		if isinstance(address, str): address = address.encode()
+		if self.index is not None:
+			key = self.index.key(address)
+			if key is not None:
+				with self._lock:
+					self.hits += 1
+				return key
+		with self._lock:
+			key = self._keys.get(address)
+			if key is not None:
+				self._keys.move_to_end(address)
+				self.hits += 1
+				return key
+			self.misses += 1
+		key = xrb_account_bytes(address)											# decoded outside the lock, invalid addresses are not cached
+		with self._lock:
+			self._keys[address] = key
+			while len(self._keys) > self.size:
+				self._keys.popitem(last=False)
+		return key
+
+	def stats(self):
+		with self._lock:
+			total = self.hits + self.misses
+			return {'hits': self.hits, 'misses': self.misses, 'size': len(self._keys),
+					'hit_rate': self.hits / total if total else 0.0}
+
+	def clear(self):
+		with self._lock:
+			self._keys.clear()
+			self.hits = 0
+			self.misses = 0
+
+	def __len__(self):
+		with self._lock:
+			return len(self._keys)
+
 def private_public(private):
 	return ed25519.SigningKey(private).get_verifying_key().to_bytes()
 	
@@ -96,6 +296,191 @@ def seed_account(seed, index):
 	account_key = BitArray(h.digest())
 	return account_key.bytes, private_public(account_key.bytes)
 
+def _map_ordered(func, arguments, workers=None, pool=None):
+	# Yield func(*args) for each tuple in arguments, in order, across workers processes if given
+	# at most two calls per worker are in flight, so neither arguments nor results pile up in memory
+	# pool is an optional multiprocessing.Pool of workers processes to reuse instead of starting one for this call
+	if pool is None:
+		if not workers:
+			for args in arguments:
+				yield func(*args)
+			return
+		with multiprocessing.Pool(workers) as pool:
+			yield from _map_ordered(func, arguments, workers, pool)
+		return
+	if not workers: workers = multiprocessing.cpu_count()
+	pending = collections.deque()
+	for args in arguments:
+		pending.append(pool.apply_async(func, args))
+		if len(pending) >= 2*workers: yield pending.popleft().get()
+	while pending:
+		yield pending.popleft().get()
+
+def _seed_account_range(seed, start, stop):
+	# Private and public keys for indexes start..stop-1 of a raw 32-byte seed, as 64-byte private+public records
+	prefix = blake2b(digest_size=32)
+	prefix.update(seed)																# seed hashed once, each index only adds its own 4 bytes
+	privates = []
+	for index in range(start, stop):
+		h = prefix.copy()
+		h.update(_INDEX.pack(index))
+		privates.append(h.digest())
+	records = bytearray(64 * (stop-start))
+	o = 0
+	for private, public in zip(privates, eddsa.publickey_many(privates)):		# one shared inversion for the whole range
+		records[o:o+32] = private
+		records[o+32:o+64] = public
+		o += 64
+	return records
+
+def seed_accounts(seed, start, stop, workers=None, chunk=256, pool=None):
+	# Lazily yield (index, private, public) for indexes start..stop-1 of a seed, same keys as seed_account
+	# seed is hex like seed_account or raw bytes, workers derives chunk indexes at a time in a process pool (pool if given)
+	if isinstance(seed, str): seed = bytes.fromhex(seed)
+	ranges = ((seed, i, min(i+chunk, stop)) for i in range(start, stop, chunk))
+	index = start
+	for records in _map_ordered(_seed_account_range, ranges, workers, pool):
+		for o in range(0, len(records), 64):
+			yield index, bytes(records[o:o+32]), bytes(records[o+32:o+64])
+			index += 1
+
+def seed_accounts_into(seed, start, stop, buffer, workers=None, chunk=256, pool=None):
+	# Fill buffer (at least 64 bytes per index) with private+public key records for indexes start..stop-1 of a seed
+	view = memoryview(buffer)
+	if len(view) < 64 * (stop-start): raise ValueError("buffer too small for %d accounts" % (stop-start))
+	if isinstance(seed, str): seed = bytes.fromhex(seed)
+	ranges = ((seed, i, min(i+chunk, stop)) for i in range(start, stop, chunk))
+	o = 0
+	for records in _map_ordered(_seed_account_range, ranges, workers, pool):
+		view[o:o+len(records)] = records
+		o += len(records)
+	return stop - start
+
+class AccountTable(object):
+	# Memory-mapped file of index -> 32-byte public key for one seed's deterministic accounts
+	# a 24-byte header (magic + seed fingerprint) is followed by the public keys of indexes 0, 1, 2, ... back to back,
+	# so opening needs no parsing and a lookup is a slice of the map
+	MAGIC = b'PYRAIACC'
+
+	def __init__(self, path, seed):
+		if isinstance(seed, str): seed = bytes.fromhex(seed)
+		self.path = path
+		self._seed = seed
+		h = blake2b(digest_size=16, person=b'pyrai-accounts')						# identifies the seed without revealing it
+		h.update(seed)
+		header = self.MAGIC + h.digest()
+		self._header = len(header)
+		self._file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+		existing = self._file.read(len(header))
+		if not existing:
+			self._file.write(header)
+			self._file.flush()
+		elif existing != header:
+			self._file.close()
+			raise ValueError("%s is not an account table for this seed" % path)
+		size = os.fstat(self._file.fileno()).st_size
+		if (size - self._header) % 32:												# drop a record left half-written by a crash
+			self._file.truncate(size - (size - self._header) % 32)
+		self._map = None
+		self._remap()
+
+	def _remap(self):
+		if self._map is not None: self._map.close()
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		self._count = (len(self._map) - self._header) // 32
+
+	def __len__(self):
+		return self._count
+
+	def public(self, index):
+		# Public key of index, IndexError if it has not been derived yet
+		if not 0 <= index < self._count: raise IndexError("account %d not in table (%d derived)" % (index, self._count))
+		o = self._header + 32*index
+		return self._map[o:o+32]
+
+	def address(self, index):
+		return account_xrb_bytes(self.public(index))
+
+	def extend(self, stop, workers=None, pool=None, until=None, chunk=256):
+		# Derive and append public keys up to index stop-1, a no-op for indexes already in the table
+		# each chunk of indexes is written as it completes, stopping after the one holding the public key until
+		# returns how many keys were appended
+		start = self._count
+		if stop <= start: return 0
+		self._file.seek(0, os.SEEK_END)
+		ranges = ((self._seed, i, min(i+chunk, stop)) for i in range(start, stop, chunk))
+		added = 0
+		for records in _map_ordered(_seed_account_range, ranges, workers, pool):
+			publics = [bytes(records[o+32:o+64]) for o in range(0, len(records), 64)]
+			self._file.write(b''.join(publics))
+			added += len(publics)
+			if until is not None and until in publics: break
+		self._file.flush()
+		os.fsync(self._file.fileno())
+		self._remap()
+		return added
+
+	def close(self):
+		if self._map is not None: self._map.close()
+		self._map = None
+		self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+class AccountFinder(object):
+	# Reverse lookup of address or public key -> index under one seed, backed by a hash map of every index derived so far
+	# the map grows incrementally: find() derives further indexes (in parallel with workers) only while the key is missing,
+	# and an optional AccountTable supplies already derived keys at startup and records new ones
+	def __init__(self, seed, table=None, chunk=4096):
+		if isinstance(seed, str): seed = bytes.fromhex(seed)
+		self._seed = seed
+		self.table = table
+		self.chunk = chunk
+		self._indexes = {}
+		self.derived = 0																# indexes 0..derived-1 are in the map
+		if table is not None:
+			self._add(0, [table.public(i) for i in range(len(table))])
+
+	def _add(self, start, publics):
+		for index, public in enumerate(publics, start):
+			self._indexes[bytes(public)] = index
+		self.derived = start + len(publics)
+
+	def extend(self, stop, workers=None, until=None):
+		# Derive indexes up to stop-1 into the map, chunk indexes per task, stopping early once the public key until is found
+		# one process pool serves the whole call, and until is checked as each task's keys arrive
+		if self.derived >= stop or (until is not None and until in self._indexes): return
+		pool = multiprocessing.Pool(workers) if workers else None
+		try:
+			if self.table is not None:
+				self.table.extend(stop, workers, pool, until, self.chunk)
+				last = min(len(self.table), stop)
+				self._add(self.derived, [self.table.public(i) for i in range(self.derived, last)])
+				return
+			for index, private, public in seed_accounts(self._seed, self.derived, stop, workers, self.chunk, pool):
+				self._indexes[public] = index
+				self.derived = index + 1
+				if public == until: return
+		finally:
+			if pool is not None: pool.terminate()
+
+	def find(self, account, search=0, workers=None):
+		# Index of account (an address, raw public key or hex public key), or None
+		# when it is not mapped yet, indexes up to search-1 are derived looking for it
+		if isinstance(account, str) and not account.startswith('xrb_'): account = bytes.fromhex(account)
+		elif isinstance(account, (str, bytes)) and len(account) != 32: account = xrb_account_bytes(account)
+		account = bytes(account)
+		if account not in self._indexes and search > self.derived:
+			self.extend(search, workers, until=account)
+		return self._indexes.get(account)
+
+	def __len__(self):
+		return len(self._indexes)
+
 def pow_threshold(check):
 	if check > b'\xFF\xFF\xFF\xC0\x00\x00\x00\x00': return True
 	return False
@@ -113,6 +498,50 @@ def pow_validate(pow, hash):
 	
 	return pow_threshold(final)
 	
+def _pow_valid(work, root):
+	# pow_validate for stored entries, where corrupt values (bad hex, or not even strings) count as invalid
+	try:
+		return pow_validate(work, root)
+	except (ValueError, TypeError):
+		return False
+
+def pow_validate_many(pairs, threshold=POW_THRESHOLD):
+	# Validate many (work, root) pairs given as raw bytes, returns a bytearray holding 1 for each valid pair and 0 otherwise
+	# pairs is a sequence of (work, root) tuples, or a buffer of POW_RECORD-byte records of work followed by root
+	# work bytes are little-endian, the order they are hashed in (bytes.fromhex(work_hex)[::-1])
+	fresh = blake2b(digest_size=8).copy
+	from_bytes = int.from_bytes
+	if isinstance(pairs, (bytes, bytearray, memoryview)):
+		view = memoryview(pairs)
+		if len(view) % POW_RECORD: raise ValueError("buffer length is not a multiple of %d" % POW_RECORD)
+		result = bytearray(len(view) // POW_RECORD)
+		for i in range(len(result)):
+			h = fresh()
+			h.update(view[i*POW_RECORD:(i+1)*POW_RECORD])						# a record is exactly the hash input
+			if from_bytes(h.digest(), 'little') > threshold: result[i] = 1
+		return result
+	result = bytearray(len(pairs))
+	for i, (work, root) in enumerate(pairs):
+		h = fresh()
+		h.update(work)
+		h.update(root)
+		if from_bytes(h.digest(), 'little') > threshold: result[i] = 1
+	return result
+
+def pow_validate_stream(f, records=65536, threshold=POW_THRESHOLD):
+	# Validate a binary file of POW_RECORD-byte records, yielding one pow_validate_many result per chunk of records
+	# reads into a single reused buffer so memory stays constant however large the file is
+	buf = bytearray(records * POW_RECORD)
+	view = memoryview(buf)
+	while True:
+		n = f.readinto(buf)
+		if not n: return
+		while n % POW_RECORD:														# short read, top up to a whole record
+			more = f.readinto(view[n:])
+			if not more: raise ValueError("file ends in a partial record")
+			n += more
+		yield pow_validate_many(view[:n], threshold)
+
 def pow_generate(hash):
 	hash_bytes = bytearray.fromhex(hash)
 	#print(hash_bytes.hex())
@@ -135,6 +564,486 @@ def pow_generate(hash):
 	random_bytes.reverse()
 	return random_bytes.hex()	
 
+def pow_search(hash_bytes, start, count, threshold=POW_THRESHOLD):
+	# Walk count nonces upward from start, return the first one whose hash beats threshold or None
+	# the nonce is packed into a preallocated buffer ahead of the root, so the only per-attempt object is the hash
+	buf = bytearray(40)
+	buf[8:] = hash_bytes
+	pack = _NONCE.pack_into
+	from_bytes = int.from_bytes
+	fresh = blake2b(digest_size=8).copy												# copying a configured hasher skips parsing digest_size every attempt
+	for nonce in range(start, min(start + count, NONCE_SPACE)):
+		pack(buf, 0, nonce)
+		h = fresh()
+		h.update(buf)
+		if from_bytes(h.digest(), 'little') > threshold:
+			return nonce
+	return None
+
+def pow_generate_sequential(hash):
+	# Same result as pow_generate, but walks nonces by counter from a random origin using pow_search
+	hash_bytes = bytes.fromhex(hash)
+	nonce = random.getrandbits(64)
+	while True:
+		found = pow_search(hash_bytes, nonce, POW_CHECK_INTERVAL)
+		if found is not None: return '%016x' % found
+		nonce = (nonce + POW_CHECK_INTERVAL) % NONCE_SPACE
+
+def pow_hashrates(hash, attempts=200000):
+	# Measure hashes per second of the original random-bytes loop in pow_generate against pow_search
+	hash_bytes = bytearray.fromhex(hash)
+	start = time.perf_counter()
+	for i in range(attempts // 256):												# replica of the pow_generate inner loop, without the early exit
+		random_bytes = bytearray((random.getrandbits(8) for i in range(8)))
+		for r in range(0,256):
+			random_bytes[7] =(random_bytes[7] + r) % 256
+			h = blake2b(digest_size=8)
+			h.update(random_bytes)
+			h.update(hash_bytes)
+			final = bytearray(h.digest())
+			final.reverse()
+			pow_threshold(final)
+	legacy = (attempts // 256) * 256 / (time.perf_counter() - start)
+
+	start = time.perf_counter()
+	pow_search(bytes(hash_bytes), 0, attempts, threshold=NONCE_SPACE)			# unreachable threshold so every nonce is tried
+	sequential = attempts / (time.perf_counter() - start)
+	return {'random': legacy, 'sequential': sequential}
+
+def _pow_worker(hash_bytes, start, threshold, found, results):
+	# Walk nonces upward from start until one passes the threshold or another worker sets the found flag
+	nonce = start
+	while not found.is_set():
+		work = pow_search(hash_bytes, nonce, POW_CHECK_INTERVAL, threshold)
+		if work is not None:
+			found.set()
+			results.put('%016x' % work)											# same big-endian hex as pow_generate
+			return
+		nonce = (nonce + POW_CHECK_INTERVAL) % NONCE_SPACE
+
+def pow_generate_parallel(hash, workers=None, difficulty=POW_THRESHOLD, stop=None):
+	# Split the 64-bit nonce space evenly across worker processes, the first to find valid work stops the others
+	# stop is an optional Event, setting it from another thread abandons the search and returns None
+	# it is only read, so the same event can be reused across calls, the workers share a private found flag
+	if workers is None: workers = multiprocessing.cpu_count()
+	if workers < 1: raise ValueError("workers must be at least 1")
+	hash_bytes = bytes.fromhex(hash)
+	found = multiprocessing.Event()
+	results = multiprocessing.Queue()
+	span = NONCE_SPACE // workers
+	offset = random.getrandbits(64)											# random origin so repeated calls don't redo the same nonces
+	procs = []
+	for i in range(workers):
+		start = (offset + i*span) % NONCE_SPACE
+		p = multiprocessing.Process(target=_pow_worker, args=(hash_bytes, start, difficulty, found, results))
+		p.daemon = True
+		p.start()
+		procs.append(p)
+	try:
+		while True:
+			try:
+				return results.get(timeout=0.1)
+			except queue.Empty:
+				if found.is_set(): break											# a worker's result is still in flight
+				if stop is not None and stop.is_set(): break
+				if not any(p.is_alive() for p in procs):
+					raise RuntimeError("all PoW workers exited without finding work")
+	finally:
+		found.set()
+		for p in procs:
+			p.join()
+	try:
+		return results.get(timeout=0.1)												# workers have exited, so any result is already in the pipe
+	except queue.Empty:
+		return None
+
+async def pow_generate_async(hash, timeout=None, difficulty=POW_THRESHOLD, workers=None, executor=None):
+	# Run pow_generate_parallel in an executor without blocking the event loop
+	# cancelling the awaiting task, or hitting timeout (asyncio.TimeoutError), stops the worker processes straight away
+	loop = asyncio.get_running_loop()
+	stop = multiprocessing.Event()
+	future = loop.run_in_executor(executor, pow_generate_parallel, hash, workers, difficulty, stop)
+	try:
+		return await asyncio.wait_for(future, timeout)
+	except BaseException:
+		stop.set()
+		raise
+
+class WorkServer(object):
+	# Minimal local stand-in for the node's work_generate/work_cancel RPC so several processes can share one PoW pool
+	# requests are HTTP POSTs of JSON actions, e.g. {"action": "work_generate", "hash": "...", "difficulty": "ffffffc000000000"}
+	def __init__(self, host='127.0.0.1', port=7076, workers=None, store=None):
+		self.host = host
+		self.port = port
+		self.workers = workers
+		self.store = store															# optional WorkStore, used for requests at the default difficulty
+		self._jobs = {}																# (hash, difficulty) -> asyncio.Task
+		self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)		# one search at a time, each using every worker
+		self._server = None
+
+	async def work_generate(self, hash, difficulty=POW_THRESHOLD):
+		# Requests for a hash that is already being worked on wait for the same search
+		key = (hash.upper(), difficulty)
+		stored = self.store is not None and difficulty == POW_THRESHOLD
+		if stored:
+			work = self.store.get(key[0])
+			if work is not None: return work
+		task = self._jobs.get(key)
+		if task is None:
+			task = asyncio.ensure_future(pow_generate_async(key[0], difficulty=difficulty, workers=self.workers, executor=self._executor))
+			self._jobs[key] = task
+			task.add_done_callback(lambda t: self._jobs.pop(key, None) if self._jobs.get(key) is t else None)
+		work = await asyncio.shield(task)
+		if stored: self.store.put(key[0], work)
+		return work
+
+	def work_cancel(self, hash):
+		hash = hash.upper()
+		for key in [k for k in self._jobs if k[0] == hash]:
+			self._jobs.pop(key).cancel()
+
+	@staticmethod
+	def _hex_field(request, name, digits, default=None):
+		# request[name] as a string of exactly digits hex characters, or ValueError naming the field
+		value = request.get(name, default)
+		if not isinstance(value, str) or len(value) != digits or value.strip(string.hexdigits):
+			raise ValueError("%s must be %d hex characters" % (name, digits))
+		return value
+
+	async def handle(self, request):
+		# Dispatch one decoded JSON request, returning the JSON-able response
+		if not isinstance(request, dict): return {'error': 'Bad request: expected a JSON object'}
+		action = request.get('action')
+		try:
+			if action == 'work_generate':
+				hash = self._hex_field(request, 'hash', 64)
+				difficulty = int(self._hex_field(request, 'difficulty', 16, '%016x' % POW_THRESHOLD), 16)
+			elif action == 'work_cancel':
+				hash = self._hex_field(request, 'hash', 64)
+		except ValueError as e:
+			return {'error': 'Bad request: %s' % e}
+		if action == 'work_generate':
+			try:
+				work = await self.work_generate(hash, difficulty)
+			except asyncio.CancelledError:
+				return {'error': 'Cancelled'}
+			return {'work': work, 'difficulty': '%016x' % difficulty}
+		if action == 'work_cancel':
+			self.work_cancel(hash)
+			return {'success': ''}
+		return {'error': 'Unknown command'}
+
+	async def _client(self, reader, writer):
+		try:
+			await reader.readline()													# request line, every request is treated as a POST
+			length = 0
+			while True:
+				line = await reader.readline()
+				if line in (b'\r\n', b'\n', b''): break
+				name, _, value = line.decode('latin-1').partition(':')
+				if name.strip().lower() == 'content-length': length = value.strip()
+			try:
+				length = int(length)
+				if length < 0: raise ValueError("negative Content-Length")
+			except ValueError as e:
+				length = None
+				response = {'error': 'Bad request: %s' % e}
+			if length is not None:
+				body = await reader.readexactly(length)
+				try:
+					response = await self.handle(json.loads(body.decode()))
+				except ValueError as e:													# undecodable body, including UnicodeDecodeError
+					response = {'error': 'Bad request: %s' % e}
+			data = json.dumps(response).encode()
+			writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % len(data) + data)
+			await writer.drain()
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass
+		finally:
+			writer.close()
+
+	async def start(self):
+		self._server = await asyncio.start_server(self._client, self.host, self.port)
+		return self._server
+
+	async def close(self):
+		for task in list(self._jobs.values()): task.cancel()
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+		self._executor.shutdown(wait=False)
+
+	def serve_forever(self):
+		async def run():
+			server = await self.start()
+			async with server:
+				await server.serve_forever()
+		asyncio.run(run())
+
+class WorkCache(object):
+	# Bounded LRU of frontier hash -> work, filled ahead of time by a background thread
+	# work for an account's next block only depends on its frontier, so it can be computed as soon as a block is published
+	def __init__(self, size=1024, path=None, generate=pow_generate_parallel, store=None):
+		if size < 1: raise ValueError("size must be at least 1")
+		self.size = size
+		self.path = path															# optional JSON file the cache is persisted to
+		self.generate = generate
+		self.store = store															# optional WorkStore checked before generating
+		self._work = collections.OrderedDict()
+		self._lock = threading.Lock()
+		self._changed = threading.Condition(self._lock)
+		self._saving = threading.Lock()												# put() runs on both the caller's and the background thread
+		self._pending = queue.Queue()
+		self._queued = set()
+		self._thread = None
+		if path is not None and os.path.exists(path): self.load()
+
+	def __len__(self):
+		with self._lock:
+			return len(self._work)
+
+	def __contains__(self, frontier):
+		with self._lock:
+			return frontier.upper() in self._work
+
+	def precompute(self, frontier):
+		# Schedule work for frontier in the background, a no-op if it is already cached or queued
+		frontier = frontier.upper()
+		with self._lock:
+			if frontier in self._work or frontier in self._queued: return
+			self._queued.add(frontier)
+			if self._thread is None or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._run, name="pyrai-work-cache")
+				self._thread.daemon = True
+				self._thread.start()
+		self._pending.put(frontier)
+
+	def get(self, frontier, block=True, timeout=None):
+		# Return work for frontier, waiting for (and scheduling if needed) the background computation when block is set
+		frontier = frontier.upper()
+		with self._lock:
+			if frontier in self._work:
+				self._work.move_to_end(frontier)
+				return self._work[frontier]
+		if not block: return None
+		self.precompute(frontier)
+		deadline = None if timeout is None else time.monotonic() + timeout
+		with self._lock:
+			while frontier not in self._work:
+				remaining = None if deadline is None else deadline - time.monotonic()
+				if remaining is not None and remaining <= 0: return None
+				self._changed.wait(remaining)
+				if frontier not in self._work and frontier not in self._queued: return None
+			self._work.move_to_end(frontier)
+			return self._work[frontier]
+
+	def put(self, frontier, work):
+		# Store work for frontier, evicting the least recently used entries beyond size
+		frontier = frontier.upper()
+		with self._lock:
+			self._work[frontier] = work
+			self._work.move_to_end(frontier)
+			while len(self._work) > self.size:
+				self._work.popitem(last=False)
+			self._changed.notify_all()
+		if self.path is not None: self.save()
+
+	def discard(self, frontier):
+		# Forget work for frontier, e.g. once the block using it has been published
+		with self._lock:
+			self._work.pop(frontier.upper(), None)
+		if self.path is not None: self.save()
+
+	def save(self):
+		with self._saving:															# one writer of path + '.tmp' at a time
+			with self._lock:
+				data = json.dumps(self._work, indent=4)
+			tmp = self.path + '.tmp'
+			with open(tmp, 'w') as f:
+				f.write(data)
+			os.replace(tmp, self.path)												# atomic, a crash never leaves a half-written cache
+
+	def load(self):
+		# Read the persisted cache, dropping entries that no longer pass pow_validate
+		with open(self.path) as f:
+			data = json.load(f, object_pairs_hook=collections.OrderedDict)
+		with self._lock:
+			for frontier, work in data.items():
+				if _pow_valid(work, frontier):											# a corrupt entry is dropped like stale work
+					self._work[frontier.upper()] = work
+			while len(self._work) > self.size:
+				self._work.popitem(last=False)
+
+	def stop(self):
+		# Finish the frontier currently being worked on and stop the background thread
+		if self._thread is not None:
+			self._pending.put(None)
+			self._thread.join()
+			self._thread = None
+
+	def _run(self):
+		while True:
+			frontier = self._pending.get()
+			if frontier is None: return
+			try:
+				if self.store is not None: work = self.store.generate(frontier, self.generate)
+				else: work = self.generate(frontier)
+				if work is not None: self.put(frontier, work)							# may fail saving, the work stays cached in memory
+			except Exception:
+				pass																	# dropped, waiters in get() see it leave the queue
+			finally:
+				with self._lock:
+					self._queued.discard(frontier)
+					self._changed.notify_all()
+
+class WorkStore(object):
+	# Durable sqlite table of root hash -> solved work, so a rebuilt or retried block never pays for the same PoW twice
+	# entries are re-checked with pow_validate when the store is opened and whenever one is read
+	def __init__(self, path):
+		self.path = path
+		self._lock = threading.Lock()
+		self._db = sqlite3.connect(path, check_same_thread=False)
+		self._db.execute("CREATE TABLE IF NOT EXISTS work (root TEXT PRIMARY KEY, work TEXT NOT NULL)")
+		self._db.commit()
+		self.dropped = self.prune()
+
+	def prune(self):
+		# Delete every entry that no longer passes pow_validate, returns how many were dropped
+		with self._lock:
+			rows = self._db.execute("SELECT root, work FROM work").fetchall()
+			stale = [(root,) for root, work in rows if not _pow_valid(work, root)]
+			self._db.executemany("DELETE FROM work WHERE root = ?", stale)
+			self._db.commit()
+		return len(stale)
+
+	def get(self, root):
+		root = root.upper()
+		with self._lock:
+			row = self._db.execute("SELECT work FROM work WHERE root = ?", (root,)).fetchone()
+			if row is None: return None
+			if _pow_valid(row[0], root): return row[0]
+			self._db.execute("DELETE FROM work WHERE root = ?", (root,))
+			self._db.commit()
+		return None
+
+	def put(self, root, work):
+		with self._lock:
+			self._db.execute("INSERT OR REPLACE INTO work (root, work) VALUES (?, ?)", (root.upper(), work))
+			self._db.commit()
+
+	def discard(self, root):
+		with self._lock:
+			self._db.execute("DELETE FROM work WHERE root = ?", (root.upper(),))
+			self._db.commit()
+
+	def generate(self, root, generate=pow_generate_parallel):
+		# Return stored work for root, only running generate (and recording its result) when there is none
+		work = self.get(root)
+		if work is None:
+			work = generate(root)
+			if work is not None: self.put(root, work)
+		return work
+
+	def close(self):
+		with self._lock:
+			self._db.close()
+
+	def __len__(self):
+		with self._lock:
+			return self._db.execute("SELECT COUNT(*) FROM work").fetchone()[0]
+
+def _percentile(values, p):
+	# Nearest-rank percentile of a non-empty list
+	ordered = sorted(values)
+	return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+def _pow_bench_worker(jobs, results, found):
+	# Benchmark worker kept alive across rounds: search each (root, start, threshold) job until it or another worker
+	# sets found, then report (work or None, nonces actually tried)
+	while True:
+		job = jobs.get()
+		if job is None: return
+		hash_bytes, nonce, threshold = job
+		work = None
+		tried = 0
+		while not found.is_set():
+			work = pow_search(hash_bytes, nonce, POW_CHECK_INTERVAL, threshold)
+			if work is not None:
+				found.set()
+				tried += (work - nonce) % NONCE_SPACE + 1
+				break
+			tried += min(POW_CHECK_INTERVAL, NONCE_SPACE - nonce)
+			nonce = (nonce + POW_CHECK_INTERVAL) % NONCE_SPACE
+		results.put((None if work is None else '%016x' % work, tried))
+
+def pow_benchmark(difficulty=BENCH_THRESHOLD, rounds=20, max_workers=None, path=None):
+	# Time rounds solves for 1..max_workers processes, each round on a fresh random root, split like pow_generate_parallel
+	# the worker processes are started once per worker count and reused for every round, so process startup is not timed
+	# returns (and optionally writes to path as JSON) the hashrate from the nonces actually tried and the solve times
+	if max_workers is None: max_workers = multiprocessing.cpu_count()
+	expected = NONCE_SPACE / (NONCE_SPACE - 1 - difficulty)						# mean attempts per solve
+	report = {
+		'difficulty': '%016x' % difficulty,
+		'rounds': rounds,
+		'expected_attempts': expected,
+		'python': platform.python_version(),
+		'cpu_count': multiprocessing.cpu_count(),
+		'single_core_hashrate': pow_hashrates(os.urandom(32).hex())['sequential'],
+		'scaling': [],
+	}
+	for workers in range(1, max_workers+1):
+		jobs = multiprocessing.Queue()
+		results = multiprocessing.Queue()
+		found = multiprocessing.Event()
+		procs = [multiprocessing.Process(target=_pow_bench_worker, args=(jobs, results, found), daemon=True) for i in range(workers)]
+		for p in procs: p.start()
+		times = []
+		hashes = 0
+		busy = 0.0
+		try:
+			for r in range(rounds):
+				root = os.urandom(32)
+				span = NONCE_SPACE // workers
+				offset = random.getrandbits(64)
+				found.clear()														# every worker reported last round, so all are idle
+				start = time.perf_counter()
+				for i in range(workers):
+					jobs.put((root, (offset + i*span) % NONCE_SPACE, difficulty))
+				work = None
+				for i in range(workers):
+					result, tried = results.get()
+					if result is not None and work is None:
+						work = result
+						times.append(time.perf_counter() - start)
+					hashes += tried
+				busy += time.perf_counter() - start									# until every worker has stopped counting
+				if not pow_validate_many([(bytes.fromhex(work)[::-1], root)], difficulty)[0]:
+					raise RuntimeError("benchmark produced invalid work %s" % work)
+		finally:
+			for p in procs: jobs.put(None)
+			for p in procs: p.join()
+		report['scaling'].append({
+			'workers': workers,
+			'hashrate': hashes / busy,
+			'hashes': hashes,
+			'mean': statistics.mean(times),
+			'median': statistics.median(times),
+			'p95': _percentile(times, 95),
+			'min': min(times),
+			'max': max(times),
+		})
+	if path is not None:
+		with open(path, 'w') as f:
+			json.dump(report, f, indent=4)
+	return report
+
+def print_pow_benchmark(report):
+	print("PoW benchmark, difficulty "+report['difficulty']+", "+str(report['rounds'])+" rounds per worker count")
+	print("Single core search: %.0f hashes/s" % report['single_core_hashrate'])
+	print("%8s %14s %10s %10s %10s" % ("workers", "hashes/s", "mean", "median", "p95"))
+	for row in report['scaling']:
+		print("%8d %14.0f %9.3fs %9.3fs %9.3fs" % (row['workers'], row['hashrate'], row['mean'], row['median'], row['p95']))
+
 def test():
 	seed = "9F1D53E732E48F25F94711D5B22086778278624F715D9B2BEC8FB81134E7C904"	
 	priv_key, pub_key = seed_account(seed,1)
@@ -148,21 +1057,8 @@ def test():
 	#    "signature": "17D6EAF3438CC592333594C96D023D742F7F38669F2DA6A763877F6958B3A76572169652E55D05E0759E114252765DB9E0F3BF55FA89F28E300CAF829C89250E"
 	#}
 
-	block = "C8E5B875778702445B25657276ABC56AA9910B283537CA438B2CC59B0CF93712"
-	times = []
-
 	print("Profiling PoW...")
-	for x in range(1,11):
-		print("Round "+str(x)+": Generating PoW...")
-		start = Timer()
-		pow = pow_generate(block)
-		end = Timer()
-		elapsed = int(end-start)
-		times.append(elapsed)
-		print("Elapsed time: "+str(elapsed)+" seconds")
-		print("Valid: "+str(pow_validate(pow,block))+" Value: "+pow)
-
-	print("Average elapsed time: "+str(sum(times)/len(times))+" seconds")
+	print_pow_benchmark(pow_benchmark(POW_THRESHOLD, rounds=10, max_workers=1))
 
 	# send block
 	bh = blake2b(digest_size=32)
@@ -181,5 +1077,192 @@ def test():
 	sig = ed25519.SigningKey(priv_key+pub_key).sign(bh.digest())														# work is not included in signature
 	print("Signature ",sig.hex())
 
+def _vanity_batch(base, start, count, pattern, regex):
+	# Derive count candidate accounts from counters start.., returning (counter, seed, private, public, address) for each match
+	# candidate seed = blake2b(base + counter), account = seed_account(seed, 0), computed without SigningKey objects or hex parsing
+	match = re.compile(pattern).search if regex else None
+	fresh_seed = blake2b(digest_size=32).copy
+	seeds = []
+	privates = []
+	for counter in range(start, start+count):
+		h = fresh_seed()
+		h.update(base)
+		h.update(_NONCE.pack(counter))
+		seed = h.digest()
+		h = fresh_seed()
+		h.update(seed)
+		h.update(_INDEX.pack(0))
+		private = h.digest()
+		seeds.append(seed)
+		privates.append(private)
+	publics = eddsa.publickey_many(privates)												# one shared inversion for the whole batch
+	found = []
+	for i, address in enumerate(account_xrb_many(publics)):
+		if match(address.decode()) if regex else address.startswith(pattern):
+			found.append((start+i, seeds[i], privates[i], publics[i], address))
+	return found
+
+def vanity_expected(prefix):
+	# Expected number of candidates before an address starts with prefix, raises ValueError if no address can
+	if isinstance(prefix, str): prefix = prefix.encode()
+	if not prefix.startswith(b'xrb_'): prefix = b'xrb_'+prefix
+	chars = prefix[4:]
+	if chars.translate(None, ENCODING) or len(chars) > 60: raise ValueError("prefix contains characters no address can")
+	if not chars: return 1.0
+	if chars[:1] not in (b'1', b'3'): raise ValueError("addresses always start with xrb_1 or xrb_3")
+	return 2.0 * 32.0**(len(chars)-1)											# first character only carries one bit of the key
+
+def vanity_search(pattern, regex=False, matches=1, workers=None, checkpoint=None, batch=256, progress=None):
+	# Search addresses across worker processes until matches addresses start with pattern (or match it as a regex)
+	# returns a list of dicts holding seed, private and public keys (hex) and the address, the seed is usable at index 0
+	# checkpoint is an optional JSON file recording the search base, counter and matches so far, an existing one is resumed
+	# progress, if given, is called after each batch with attempts, seconds, keys_per_second and expected_seconds
+	if workers is None: workers = multiprocessing.cpu_count()
+	if not regex:
+		expected = vanity_expected(pattern)
+		pattern = pattern if isinstance(pattern, bytes) else pattern.encode()
+		if not pattern.startswith(b'xrb_'): pattern = b'xrb_'+pattern
+	else:
+		re.compile(pattern)															# fail early on a bad expression
+		expected = None
+	state = {'pattern': pattern if regex else pattern.decode(), 'regex': regex, 'base': os.urandom(32).hex(), 'counter': 0, 'matches': []}
+	if checkpoint is not None and os.path.exists(checkpoint):
+		with open(checkpoint) as f:
+			saved = json.load(f)
+		if (saved['pattern'], saved['regex']) != (state['pattern'], regex):
+			raise ValueError("checkpoint %s is for a different search (%s)" % (checkpoint, saved['pattern']))
+		state = saved
+	base = bytes.fromhex(state['base'])
+	start = time.perf_counter()
+	attempts = 0
+	last_save = start
+
+	def save():
+		tmp = checkpoint + '.tmp'
+		with open(tmp, 'w') as f:
+			json.dump(state, f, indent=4)
+		os.replace(tmp, checkpoint)
+
+	with multiprocessing.Pool(workers) as pool:
+		pending = collections.deque()
+		counter = state['counter']
+		while len(state['matches']) < matches:
+			while len(pending) < 2*workers:
+				pending.append((counter, pool.apply_async(_vanity_batch, (base, counter, batch, pattern, regex))))
+				counter += batch
+			done, result = pending.popleft()
+			for c, seed, private, public, address in result.get():
+				state['matches'].append({'counter': c, 'seed': seed.hex().upper(), 'private': private.hex().upper(),
+										 'public': public.hex().upper(), 'address': address.decode()})
+			state['counter'] = done + batch											# batches complete in order, so everything below is searched
+			attempts += batch
+			seconds = time.perf_counter() - start
+			if progress is not None:
+				rate = attempts / seconds if seconds else 0.0
+				progress({'attempts': attempts, 'seconds': seconds, 'keys_per_second': rate, 'matches': len(state['matches']),
+						  'expected_seconds': expected / rate if expected is not None and rate else None})
+			if checkpoint is not None and time.perf_counter() - last_save > 10:
+				save()
+				last_save = time.perf_counter()
+	if checkpoint is not None: save()
+	return state['matches'][:matches]
+
+def _convert_lines(direction, lines):
+	# Convert one chunk of input lines, 'encode' takes hex public keys and 'decode' takes addresses
+	# returns the output text for the chunk (one line per input line, empty for invalid input) and the number of invalid lines
+	lines = [line.strip() for line in lines]
+	if direction == 'encode':
+		keys = []
+		for line in lines:
+			try:
+				key = bytes.fromhex(line)
+			except ValueError:
+				key = None
+			keys.append(key if key is not None and len(key) == 32 else None)
+		encoded = iter(account_xrb_many([k for k in keys if k is not None]))
+		out = [next(encoded).decode() if k is not None else '' for k in keys]
+	else:
+		out = [k.hex().upper() if k is not None else '' for k in xrb_account_many(lines)]
+	return '\n'.join(out) + '\n', out.count('')
+
+def convert_stream(files, out, direction, workers=None, chunk=65536):
+	# Stream lines from files through the batch address codec in chunks, optionally across a process pool
+	# at most two chunks per worker are in flight, so memory stays constant however large the input is
+	lines = itertools.chain.from_iterable(files)
+	chunks = iter(lambda: list(itertools.islice(lines, chunk)), [])
+	stats = {'lines': 0, 'invalid': 0}
+	start = time.perf_counter()
+	def write(result):
+		text, invalid = result
+		out.write(text)
+		stats['lines'] += text.count('\n')
+		stats['invalid'] += invalid
+	for result in _map_ordered(_convert_lines, ((direction, lines_chunk) for lines_chunk in chunks), workers):
+		write(result)
+	stats['seconds'] = time.perf_counter() - start
+	stats['lines_per_second'] = stats['lines'] / stats['seconds'] if stats['seconds'] else 0.0
+	return stats
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog='pyrai', description="RaiBlocks address, key and proof of work tools")
+	commands = parser.add_subparsers(dest='command')
+
+	for name, text in (('encode', "hex public keys to xrb_ addresses"), ('decode', "xrb_ addresses to hex public keys")):
+		p = commands.add_parser(name, help=text)
+		p.add_argument('files', nargs='*', help="input files, one entry per line (default: stdin)")
+		p.add_argument('-o', '--output', help="output file (default: stdout)")
+		p.add_argument('-j', '--workers', type=int, default=0, help="worker processes (default: convert in this process)")
+		p.add_argument('--chunk', type=int, default=65536, help="lines per chunk")
+		p.add_argument('-q', '--quiet', action='store_true', help="don't print the throughput report")
+
+	p = commands.add_parser('bench', help="proof of work benchmark")
+	p.add_argument('--difficulty', default='%016x' % BENCH_THRESHOLD, help="threshold as 16 hex digits")
+	p.add_argument('--rounds', type=int, default=20)
+	p.add_argument('-j', '--workers', type=int, default=None, help="highest worker count to measure (default: cpu count)")
+	p.add_argument('--json', help="also write the report to this file")
+
+	p = commands.add_parser('serve', help="local work_generate/work_cancel server")
+	p.add_argument('--host', default='127.0.0.1')
+	p.add_argument('--port', type=int, default=7076)
+	p.add_argument('-j', '--workers', type=int, default=None)
+	p.add_argument('--store', help="sqlite file of solved work")
+
+	p = commands.add_parser('vanity', help="search for addresses starting with a prefix or matching a regex")
+	p.add_argument('pattern', help="address prefix, e.g. xrb_1abc, or a regular expression with --regex")
+	p.add_argument('--regex', action='store_true')
+	p.add_argument('-n', '--matches', type=int, default=1)
+	p.add_argument('-j', '--workers', type=int, default=None)
+	p.add_argument('--checkpoint', help="JSON file to save progress to and resume from")
+
+	commands.add_parser('test', help="run the built-in demo")
+	args = parser.parse_args(argv)
+
+	if args.command in ('encode', 'decode'):
+		files = [open(path) for path in args.files] or [sys.stdin]
+		out = open(args.output, 'w') if args.output else sys.stdout
+		try:
+			stats = convert_stream(files, out, args.command, args.workers, args.chunk)
+		finally:
+			for f in files:
+				if f is not sys.stdin: f.close()
+			if out is not sys.stdout: out.close()
+		if not args.quiet:
+			sys.stderr.write("%d lines (%d invalid) in %.2fs, %.0f lines/s\n" % (stats['lines'], stats['invalid'], stats['seconds'], stats['lines_per_second']))
+		return 1 if stats['invalid'] else 0
+	if args.command == 'bench':
+		print_pow_benchmark(pow_benchmark(int(args.difficulty, 16), args.rounds, args.workers, args.json))
+	elif args.command == 'vanity':
+		def report(p):
+			eta = " expected %.0fs per match" % p['expected_seconds'] if p['expected_seconds'] is not None else ""
+			sys.stderr.write("\r%d keys in %.0fs, %.0f keys/s,%s " % (p['attempts'], p['seconds'], p['keys_per_second'], eta))
+		for match in vanity_search(args.pattern, args.regex, args.matches, args.workers, args.checkpoint, progress=report):
+			sys.stderr.write("\n")
+			print(match['address']+" seed "+match['seed']+" private "+match['private'])
+	elif args.command == 'serve':
+		WorkServer(args.host, args.port, args.workers, WorkStore(args.store) if args.store else None).serve_forever()
+	else:
+		test()
+	return 0
+
 if __name__ == '__main__':
-	test()
\ No newline at end of file
+	sys.exit(main())
\ No newline at end of file
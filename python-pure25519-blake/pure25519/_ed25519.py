@@ -49,12 +49,12 @@ def sign(msg, skvk):
     sig = eddsa.signature(msg, sk, vk)
     return sig+msg
 
-def open(sigmsg, vk):
+def open(sigmsg, vk, table=None):
     assert len(vk) == 32
     sig = sigmsg[:64]
     msg = sigmsg[64:]
     try:
-        valid = eddsa.checkvalid(sig, msg, vk)
+        valid = eddsa.checkvalid(sig, msg, vk, table)
     except ValueError as e:
         raise BadSignatureError(e)
     except Exception as e:
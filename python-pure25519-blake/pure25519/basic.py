@@ -1,5 +1,5 @@
-import binascii, hashlib, itertools
-from pyblake2 import blake2b
+import sys, binascii, hashlib, itertools, collections, threading
+from pure25519.hashing import blake2b
 
 Q = 2**255 - 19
 L = 2**252 + 27742317777372353535851937790883648493
@@ -30,7 +30,23 @@ def xform_affine_to_extended(pt):
 
 def xform_extended_to_affine(pt):
     (x, y, z, _) = pt
-    return ((x*inv(z))%Q, (y*inv(z))%Q)
+    zi = inv(z)
+    return ((x*zi)%Q, (y*zi)%Q)
+
+def inv_many(values):
+    # Montgomery's simultaneous inversion: one inv() and 3 multiplications
+    # per value, instead of one inv() each. No value may be 0 mod Q.
+    prefix = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        acc = (acc * v) % Q
+    acc = inv(acc)
+    out = [None] * len(prefix)
+    for i in range(len(prefix)-1, -1, -1):
+        out[i] = (acc * prefix[i]) % Q
+        acc = (acc * values[i]) % Q
+    return out
 
 def double_element(pt): # extended->extended
     # dbl-2008-hwcd
@@ -110,6 +126,312 @@ def scalarmult_element(pt, n): # extended->extended
     _ = double_element(scalarmult_element(pt, n>>1))
     return _add_elements_nonunfied(_, pt) if n&1 else _
 
+def negate_extended(pt):
+    (X, Y, Z, T) = pt
+    return ((-X) % Q, Y, Z, (-T) % Q)
+
+def wnaf(n, w=5):
+    # little-endian width-w NAF of n>0: every digit is zero or odd and in
+    # -2**(w-1)..2**(w-1), with at most one non-zero digit in any w in a row
+    digits = []
+    while n:
+        if n & 1:
+            e = n & ((1 << w) - 1)
+            if e >= (1 << (w-1)):
+                e -= (1 << w)
+            n -= e
+        else:
+            e = 0
+        digits.append(e)
+        n >>= 1
+    return digits
+
+def scalarmult_element_wnaf(pt, n): # extended->extended
+    # Iterative variable-base scalarmult, using a per-call table of the odd
+    # multiples pt,3*pt,..,15*pt and the width-5 NAF of n: about n.bit_length()
+    # doublings but only ~1/6 as many additions, instead of ~1/2. The
+    # additions are unified, so this tolerates arbitrary points (including
+    # Zero and points of order 2/4/8) like scalarmult_element_safe_slow.
+    assert n >= 0
+    if n == 0:
+        return xform_affine_to_extended((0,1))
+    pt2 = double_element(pt)
+    table = [pt]
+    for i in range(7):
+        table.append(add_elements(table[-1], pt2))
+    digits = wnaf(n)
+    (X1, Y1, Z1, T1) = table[digits.pop() >> 1] # the top digit is always positive
+    for e in reversed(digits):
+        # double_element, inlined, and T is only needed ahead of an addition
+        A = X1*X1
+        B = Y1*Y1
+        C = 2*Z1*Z1
+        J = X1+Y1
+        E = (J*J-A-B) % Q
+        G = (B-A) % Q
+        F = (G-C) % Q
+        H = (-A-B) % Q
+        X1 = (E*F) % Q
+        Y1 = (G*H) % Q
+        Z1 = (F*G) % Q
+        if e:
+            T1 = (E*H) % Q
+            if e > 0:
+                (X1, Y1, Z1, T1) = add_elements((X1, Y1, Z1, T1), table[e >> 1])
+            else:
+                (X1, Y1, Z1, T1) = add_elements((X1, Y1, Z1, T1),
+                                                negate_extended(table[(-e) >> 1]))
+    if digits and not digits[0]: # the loop ended on a doubling
+        T1 = (E*H) % Q
+    return (X1, Y1, Z1, T1)
+
+# Fixed-base scalarmult. Multiples of the base point are precomputed once,
+# as (y+x, y-x, 2*d*x*y) with Z=1 (the "Niels" form), so adding one to an
+# extended point costs 7 field multiplications and no doublings.
+
+def xform_extended_to_niels(pt):
+    (x, y) = xform_extended_to_affine(pt)
+    return ((y+x) % Q, (y-x) % Q, (2*d*x*y) % Q)
+
+def add_niels(pt, niels): # extended+niels->extended
+    # add-2008-hwcd-3 (unified) with Z2=1 and the products of pt2 precomputed
+    (X1, Y1, Z1, T1) = pt
+    (ypx, ymx, xy2d) = niels
+    A = ((Y1-X1)*ymx) % Q
+    B = ((Y1+X1)*ypx) % Q
+    C = (T1*xy2d) % Q
+    D = (2*Z1) % Q
+    E = (B-A) % Q
+    F = (D-C) % Q
+    G = (D+C) % Q
+    H = (B+A) % Q
+    return ((E*F) % Q, (G*H) % Q, (F*G) % Q, (E*H) % Q)
+
+def xform_extended_to_niels_many(pts):
+    # xform_extended_to_niels() for each point, with one shared inversion
+    niels = []
+    for (pt, zi) in zip(pts, inv_many([pt[2] for pt in pts])):
+        (x, y) = ((pt[0]*zi) % Q, (pt[1]*zi) % Q)
+        niels.append(((y+x) % Q, (y-x) % Q, (2*d*x*y) % Q))
+    return niels
+
+def negate_niels(niels):
+    (ypx, ymx, xy2d) = niels
+    return (ymx, ypx, (-xy2d) % Q)
+
+def radix16_signed(n):
+    # 0 <= n < 2**255 -> 64 little-endian digits in -8..8, sum(e[i]*16**i)=n
+    e = [(n >> (4*i)) & 15 for i in range(64)]
+    carry = 0
+    for i in range(63):
+        e[i] += carry
+        carry = (e[i] + 8) >> 4
+        e[i] -= carry << 4
+    e[63] += carry
+    return e
+
+_base_table = None
+
+def base_table():
+    # _base_table[i][j] = (j+1) * 16**i * B, for the 64 signed radix-16 digits
+    global _base_table
+    if _base_table is None:
+        table = []
+        P = xform_affine_to_extended(B)
+        for i in range(64):
+            row = [P]
+            for j in range(7):
+                row.append(add_elements(row[-1], P))
+            table.append([xform_extended_to_niels(pt) for pt in row])
+            for j in range(4):
+                P = double_element(P)
+        _base_table = table
+    return _base_table
+
+def scalarmult_base(n): # ->extended
+    # n*B for 0 <= n < L, with one table addition per non-zero digit and no
+    # doublings. Unified additions, so partial sums may pass through Zero.
+    table = base_table()
+    pt = xform_affine_to_extended((0,1))
+    for i, e in enumerate(radix16_signed(n)):
+        if e > 0:
+            pt = add_niels(pt, table[i][e-1])
+        elif e < 0:
+            pt = add_niels(pt, negate_niels(table[i][-e-1]))
+    return pt
+
+# Double-scalar multiplication, for signature verification
+
+_base_odd_multiples = None
+
+def base_odd_multiples():
+    # B,3B,5B,..,127B in Niels form, for the width-8 NAF of the B scalar
+    global _base_odd_multiples
+    if _base_odd_multiples is None:
+        P = xform_affine_to_extended(B)
+        P2 = double_element(P)
+        row = [P]
+        for i in range(63):
+            row.append(add_elements(row[-1], P2))
+        _base_odd_multiples = [xform_extended_to_niels(pt) for pt in row]
+    return _base_odd_multiples
+
+def double_scalarmult_element(a, pt, b): # ->extended
+    # a*B + b*pt (Straus/Shamir): both scalars share one chain of doublings,
+    # with width-8 NAF digits of a from the static table above and width-5
+    # NAF digits of b from a per-call table of odd multiples of pt. Unified
+    # additions, so pt may be any point.
+    assert a >= 0 and b >= 0
+    base = base_odd_multiples()
+    pt2 = double_element(pt)
+    table = [pt]
+    for i in range(7):
+        table.append(add_elements(table[-1], pt2))
+    da = wnaf(a, 8) if a else []
+    db = wnaf(b) if b else []
+    n = max(len(da), len(db))
+    da.extend([0] * (n-len(da)))
+    db.extend([0] * (n-len(db)))
+    acc = xform_affine_to_extended((0,1))
+    for i in range(n-1, -1, -1):
+        acc = double_element(acc)
+        e = da[i]
+        if e > 0:
+            acc = add_niels(acc, base[e >> 1])
+        elif e < 0:
+            acc = add_niels(acc, negate_niels(base[(-e) >> 1]))
+        e = db[i]
+        if e > 0:
+            acc = add_elements(acc, table[e >> 1])
+        elif e < 0:
+            acc = add_elements(acc, negate_extended(table[(-e) >> 1]))
+    return acc
+
+def double_scalarmult_niels(a, odd_niels, w, b): # ->extended
+    # a*B + b*P, as double_scalarmult_element() but with P's odd multiples
+    # P,3P,..,(2**(w-1)-1)P already in Niels form for width-w NAF digits
+    assert a >= 0 and b >= 0
+    base = base_odd_multiples()
+    da = wnaf(a, 8) if a else []
+    db = wnaf(b, w) if b else []
+    n = max(len(da), len(db))
+    da.extend([0] * (n-len(da)))
+    db.extend([0] * (n-len(db)))
+    acc = xform_affine_to_extended((0,1))
+    for i in range(n-1, -1, -1):
+        acc = double_element(acc)
+        e = da[i]
+        if e > 0:
+            acc = add_niels(acc, base[e >> 1])
+        elif e < 0:
+            acc = add_niels(acc, negate_niels(base[(-e) >> 1]))
+        e = db[i]
+        if e > 0:
+            acc = add_niels(acc, odd_niels[e >> 1])
+        elif e < 0:
+            acc = add_niels(acc, negate_niels(odd_niels[(-e) >> 1]))
+    return acc
+
+def _straus_extended(terms): # [(scalar, extended)] ->extended
+    # Straus' method: one shared chain of doublings, and each term adds from
+    # its own table of odd multiples at the non-zero digits of its width-5
+    # NAF. Unified additions, so any points are accepted.
+    events = {} # bit position -> [(digit, table), ..]
+    top = 0
+    for (s, pt) in terms:
+        pt2 = double_element(pt)
+        table = [pt]
+        for i in range(7):
+            table.append(add_elements(table[-1], pt2))
+        digits = wnaf(s)
+        top = max(top, len(digits))
+        for i, e in enumerate(digits):
+            if e:
+                events.setdefault(i, []).append((e, table))
+    acc = xform_affine_to_extended((0,1))
+    for i in range(top-1, -1, -1):
+        acc = double_element(acc)
+        for (e, table) in events.get(i, ()):
+            if e > 0:
+                acc = add_elements(acc, table[e >> 1])
+            else:
+                acc = add_elements(acc, negate_extended(table[(-e) >> 1]))
+    return acc
+
+def _pippenger_window(n, bits):
+    # window width c minimising the additions: every window puts each term
+    # into one of 2**(c-1) buckets (signed digits) and then sums the buckets
+    best = None
+    for c in range(1, 17):
+        windows = (bits + c) // c
+        cost = windows * (n + 2**c) + bits
+        if best is None or cost < best[0]:
+            best = (cost, c)
+    return best[1]
+
+def _pippenger_extended(terms, c): # [(scalar, extended)] ->extended
+    # Pippenger's bucket method with signed base-2**c digits: each window
+    # drops every point into the bucket of its digit, then a running sum
+    # over the buckets adds bucket j in j times
+    half = 1 << (c-1)
+    mask = (1 << c) - 1
+    columns = []
+    for (s, pt) in terms:
+        digits = []
+        while s:
+            d = s & mask
+            s >>= c
+            if d > half:
+                d -= (1 << c)
+                s += 1
+            digits.append(d)
+        columns.append((digits, pt, negate_extended(pt)))
+    windows = max([len(digits) for (digits, pt, neg) in columns])
+    acc = None
+    for w in range(windows-1, -1, -1):
+        if acc is not None:
+            for i in range(c):
+                acc = double_element(acc)
+        buckets = [None] * (half+1)
+        for (digits, pt, neg) in columns:
+            if w >= len(digits):
+                continue
+            d = digits[w]
+            if d == 0:
+                continue
+            if d < 0:
+                (d, pt) = (-d, neg)
+            b = buckets[d]
+            buckets[d] = pt if b is None else add_elements(b, pt)
+        running = None
+        for j in range(half, 0, -1):
+            b = buckets[j]
+            if b is not None:
+                running = b if running is None else add_elements(running, b)
+            if running is not None:
+                acc = running if acc is None else add_elements(acc, running)
+    if acc is None:
+        return xform_affine_to_extended((0,1))
+    return acc
+
+STRAUS_MAX = 64 # above this many terms, Pippenger needs fewer additions
+
+def multiscalarmult_extended(terms): # [(scalar, extended)] ->extended
+    # sum(s*pt) for non-negative scalars
+    terms = [(s, pt) for (s, pt) in terms if s]
+    for (s, pt) in terms:
+        assert s >= 0
+    if len(terms) <= STRAUS_MAX:
+        return _straus_extended(terms)
+    bits = max([s.bit_length() for (s, pt) in terms])
+    return _pippenger_extended(terms, _pippenger_window(len(terms), bits))
+
+def extended_equal(pt1, pt2):
+    # compare two extended points without converting either back to affine
+    (X1, Y1, Z1, _) = pt1
+    (X2, Y2, Z2, _) = pt2
+    return (X1*Z2 - X2*Z1) % Q == 0 and (Y1*Z2 - Y2*Z1) % Q == 0
+
 # points are encoded as 32-bytes little-endian, b255 is sign, b2b1b0 are 0
 
 def encodepoint(P):
@@ -122,6 +444,13 @@ def encodepoint(P):
         y += 1<<255
     return binascii.unhexlify("%064x" % y)[::-1]
 
+def encodepoints_extended(pts): # [extended] -> [32 bytes]
+    # like encodepoint(xform_extended_to_affine(pt)) for each point, sharing
+    # a single field inversion between all of them
+    zis = inv_many([pt[2] for pt in pts])
+    return [encodepoint(((pt[0]*zi)%Q, (pt[1]*zi)%Q))
+            for (pt, zi) in zip(pts, zis)]
+
 def isoncurve(P):
     x = P[0]
     y = P[1]
@@ -140,6 +469,27 @@ def decodepoint(s):
     if not isoncurve(P): raise NotOnCurve("decoding point that is not on curve")
     return P
 
+def decodepoints(strings):
+    # decodepoint() for each 32-byte string, sharing the inversion inside
+    # xrecover() between all of them. Entries that do not decode to a point
+    # on the curve are None.
+    ys = []
+    for s in strings:
+        ys.append(int(binascii.hexlify(s[:32][::-1]), 16))
+    clamp = (1 << 255) - 1
+    invs = inv_many([(d*(u & clamp)*(u & clamp)+1) % Q for u in ys])
+    points = []
+    for (unclamped, iv) in zip(ys, invs):
+        y = unclamped & clamp # clear MSB
+        xx = (y*y-1) * iv
+        x = pow(xx,(Q+3)//8,Q)
+        if (x*x - xx) % Q != 0: x = (x*I) % Q
+        if x % 2 != 0: x = Q-x
+        if bool(x & 1) != bool(unclamped & (1<<255)): x = Q-x
+        P = [x,y]
+        points.append(P if isoncurve(P) else None)
+    return points
+
 # scalars are encoded as 32-bytes little-endian
 
 def bytes_to_scalar(s):
@@ -204,7 +554,7 @@ class ElementOfUnknownGroup:
         if isinstance(s, ElementOfUnknownGroup):
             raise TypeError("elements cannot be multiplied together")
         assert s >= 0
-        product = scalarmult_element_safe_slow(self.XYTZ, s)
+        product = scalarmult_element_wnaf(self.XYTZ, s)
         return ElementOfUnknownGroup(product)
 
     def to_bytes(self):
@@ -235,14 +585,19 @@ class Element(ElementOfUnknownGroup):
         if isinstance(s, ElementOfUnknownGroup):
             raise TypeError("elements cannot be multiplied together")
         # scalarmult of subgroup members can be done modulo the subgroup
-        # order, and using the faster non-unified function.
+        # order. The width-5 NAF multiplication uses unified additions, like
+        # ElementOfUnknownGroup.scalarmult.
         s = s % L
         # scalarmult(s=0) gets you Zero
         if s == 0:
             return Zero
         # scalarmult(s=1) gets you self, which is a subgroup member
         # scalarmult(s<grouporder) gets you a different subgroup member
-        return Element(scalarmult_element(self.XYTZ, s))
+        return Element(scalarmult_element_wnaf(self.XYTZ, s))
+
+    def precompute(self, w=6):
+        # a table for repeated multiplications of this element
+        return ElementTable(self, w)
 
     # negation and subtraction only make sense for the main subgroup
     def negate(self):
@@ -251,6 +606,46 @@ class Element(ElementOfUnknownGroup):
     def subtract(self, other):
         return self.add(other.negate())
 
+class ElementTable(object):
+    # the odd multiples e,3e,..,(2**(w-1)-1)e of a subgroup element in Niels
+    # form, so width-w NAF multiplications by it need no per-call table
+    def __init__(self, element, w=6):
+        assert isinstance(element, Element)
+        assert 2 <= w <= 12
+        self.element = element
+        self.w = w
+        P = element.XYTZ
+        P2 = double_element(P)
+        row = [P]
+        for i in range((1 << (w-2)) - 1):
+            row.append(add_elements(row[-1], P2))
+        self.odd_niels = xform_extended_to_niels_many(row)
+        # approximate memory footprint, for bounding caches of tables
+        self.nbytes = sys.getsizeof(self.odd_niels) + sum(
+            sys.getsizeof(n) + sum(sys.getsizeof(c) for c in n)
+            for n in self.odd_niels)
+
+    def double_scalarmult(self, a, b):
+        # a*B + b*element, as an extended point
+        return double_scalarmult_niels(a % L, self.odd_niels, self.w, b % L)
+
+    def scalarmult(self, s):
+        s = s % L
+        if s == 0:
+            return Zero
+        return Element(self.double_scalarmult(0, s))
+
+class _BaseElement(Element):
+    # the generator B, whose scalarmult uses the precomputed table above
+
+    def scalarmult(self, s):
+        if isinstance(s, ElementOfUnknownGroup):
+            raise TypeError("elements cannot be multiplied together")
+        s = s % L
+        if s == 0:
+            return Zero
+        return Element(scalarmult_base(s))
+
 class _ZeroElement(ElementOfUnknownGroup):
     def add(self, other):
         return other # zero+anything = anything
@@ -262,11 +657,36 @@ class _ZeroElement(ElementOfUnknownGroup):
         return self.add(other.negate())
 
 
-Base = Element(xform_affine_to_extended(B))
+Base = _BaseElement(xform_affine_to_extended(B))
 Zero = _ZeroElement(xform_affine_to_extended((0,1))) # the neutral (identity) element
 
 _zero_bytes = Zero.to_bytes()
 
+def elements_to_bytes(elements):
+    # e.to_bytes() for many elements at the cost of a single inversion
+    return encodepoints_extended([e.XYTZ for e in elements])
+
+def multiscalarmult(terms):
+    """Return sum(s*e) for a list of (scalar, element) pairs, with one shared
+    chain of doublings (Straus) or, for many terms, Pippenger's buckets.
+    Scalars are reduced mod L when every element is in the subgroup."""
+    for (s, e) in terms:
+        if isinstance(s, ElementOfUnknownGroup):
+            raise TypeError("elements cannot be multiplied together")
+        if not isinstance(e, ElementOfUnknownGroup):
+            raise TypeError("scalars can only multiply elements")
+    # Zero contributes nothing, and belongs to every subgroup
+    terms = [(s, e) for (s, e) in terms if e is not Zero]
+    subgroup = all(isinstance(e, Element) for (s, e) in terms)
+    if subgroup:
+        terms = [(s % L, e) for (s, e) in terms]
+    sum_XYTZ = multiscalarmult_extended([(s, e.XYTZ) for (s, e) in terms])
+    if is_extended_zero(sum_XYTZ):
+        return Zero
+    if subgroup:
+        return Element(sum_XYTZ)
+    return ElementOfUnknownGroup(sum_XYTZ)
+
 
 def arbitrary_element(seed): # unknown DL
     # TODO: if we don't need uniformity, maybe use just sha256 here?
@@ -346,3 +766,91 @@ def bytes_to_element(bytes):
     # the point is in the expected 1*L subgroup, not in the 2/4/8 groups,
     # or in the 2*L/4*L/8*L groups. Promote it to a correct-group Element.
     return Element(P.XYTZ)
+
+def bytes_to_elements(strings):
+    # bytes_to_element() for many encodings at once, sharing the field
+    # inversion. Entries that bytes_to_element() would reject (not on the
+    # curve, Zero, or outside the subgroup) are None instead of raising.
+    elements = []
+    for (s, P) in zip(strings, decodepoints(strings)):
+        if P is None or s == _zero_bytes:
+            elements.append(None)
+            continue
+        XYTZ = xform_affine_to_extended(P)
+        if not is_extended_zero(scalarmult_element_wnaf(XYTZ, L)):
+            elements.append(None)
+            continue
+        elements.append(Element(XYTZ))
+    return elements
+
+class LRUCache(object):
+    """Thread-safe bounded LRU mapping with hit and miss counters. Entries
+    are evicted, least recently used first, once the total sizeof(value)
+    (1 per entry by default) passes max_size. max_size=0 disables it."""
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._sizeof = sizeof or (lambda value: 1)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            size = self._sizeof(value)
+            if key in self._entries or size > self.max_size:
+                return
+            self._entries[key] = value
+            self.size += size
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_size:
+            (key, value) = self._entries.popitem(last=False)
+            self.size -= self._sizeof(value)
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "entries": len(self._entries), "size": self.size,
+                    "max_size": self.max_size}
+
+ELEMENT_CACHE_SIZE = 16384 # validated elements, a few hundred bytes each
+
+# encoding -> validated Element, for keys that are decoded over and over
+element_cache = LRUCache(ELEMENT_CACHE_SIZE)
+
+def bytes_to_element_cached(s):
+    # bytes_to_element() through element_cache. Only validated elements are
+    # cached, so a rejected encoding raises every time.
+    s = bytes(s) # bytearray/memoryview are not hashable
+    e = element_cache.get(s)
+    if e is None:
+        e = bytes_to_element(s)
+        element_cache.put(s, e)
+    return e
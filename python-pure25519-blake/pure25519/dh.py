@@ -1,6 +1,6 @@
 from pure25519.basic import random_scalar, Base, bytes_to_element
 #from hashlib import sha256
-from pyblake2 import blake2b
+from pure25519.hashing import blake2b
 
 # In practice, you should use the Curve25519 function, which is better in
 # every way. But this is an example of what Diffie-Hellman looks like.
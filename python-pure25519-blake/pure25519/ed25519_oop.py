@@ -1,6 +1,7 @@
 import os
 import base64
-from . import _ed25519
+from . import _ed25519, eddsa
+from .basic import bytes_to_element_cached
 BadSignatureError = _ed25519.BadSignatureError
 
 def create_keypair(entropy=os.urandom):
@@ -129,7 +130,10 @@ class SigningKey(object):
         return prefix+sig_out
 
 class VerifyingKey(object):
-    def __init__(self, vk_s, prefix="", encoding=None):
+    # cache=True decodes the key once, here (raising ValueError if it is not
+    # a valid point), and keeps its own table for every verify(). Otherwise
+    # verify() goes through the process-wide caches in eddsa and basic.
+    def __init__(self, vk_s, prefix="", encoding=None, cache=False):
         if not isinstance(prefix, bytes):
             prefix = prefix.encode('ascii')
         if not isinstance(vk_s, bytes):
@@ -141,6 +145,9 @@ class VerifyingKey(object):
 
         assert len(vk_s) == 32
         self.vk_s = vk_s
+        self._table = None
+        if cache:
+            self._table = bytes_to_element_cached(vk_s).precompute()
 
     def to_bytes(self, prefix=""):
         if not isinstance(prefix, bytes):
@@ -174,9 +181,26 @@ class VerifyingKey(object):
         sig_S = sig[32:]
         sig_and_msg = sig_R + sig_S + msg
         # this might raise BadSignatureError
-        msg2 = _ed25519.open(sig_and_msg, self.vk_s)
+        msg2 = _ed25519.open(sig_and_msg, self.vk_s, self._table)
         assert msg2 == msg
 
+    @staticmethod
+    def verify_batch(items):
+        # items are (sig, msg, vk) with raw 64-byte signatures and vk either
+        # a VerifyingKey or its 32 bytes. Raises BadSignatureError whose
+        # argument lists the indexes of every bad signature.
+        triples = []
+        for (sig, msg, vk) in items:
+            if isinstance(vk, VerifyingKey):
+                vk = vk.vk_s
+            assert isinstance(sig, bytes)
+            assert isinstance(msg, bytes)
+            triples.append((sig, msg, vk))
+        results = eddsa.verify_batch(triples)
+        bad = [i for (i, ok) in enumerate(results) if not ok]
+        if bad:
+            raise BadSignatureError(bad)
+
 def selftest():
     message = b"crypto libraries should always test themselves at powerup"
     sk = SigningKey(b"priv0-VIsfn5OFGa09Un2MR6Hm7BQ5++xhcQskU2OGXG8jSJl4cWLZrRrVcSN2gVYMGtZT+3354J5jfmqAcuRSD9KIyg",
@@ -1,9 +1,15 @@
 
 from pure25519.basic import (bytes_to_clamped_scalar,
                              bytes_to_scalar, scalar_to_bytes,
-                             bytes_to_element, Base)
-import hashlib, binascii
-from pyblake2 import blake2b
+                             bytes_to_element, Base, L, elements_to_bytes,
+                             double_scalarmult_element, negate_extended,
+                             extended_equal, multiscalarmult_extended,
+                             is_extended_zero, bytes_to_elements,
+                             LRUCache, element_cache, bytes_to_element_cached)
+import os, hashlib, binascii
+from pure25519.hashing import blake2b
+
+TABLE_CACHE_BYTES = 16 * 2**20 # about 4000 keys with the default tables
 
 def H(m):
     #return hashlib.sha512(m).digest()
@@ -16,6 +22,14 @@ def publickey(seed):
     A = Base.scalarmult(a)
     return A.to_bytes()
 
+def publickey_many(seeds):
+    # publickey() for each seed, encoding all the points with one inversion
+    points = []
+    for seed in seeds:
+        assert len(seed) == 32
+        points.append(Base.scalarmult(bytes_to_clamped_scalar(H(seed)[:32])))
+    return elements_to_bytes(points)
+
 def Hint(m):
     h = H(m)
     return int(binascii.hexlify(h[::-1]), 16)
@@ -32,20 +46,124 @@ def signature(m,sk,pk):
     S = r + Hint(R_bytes + pk + m) * a
     return R_bytes + scalar_to_bytes(S)
 
-def checkvalid(s, m, pk):
+def signature_many(ms, sk, pk):
+    # signature() for each message under one key, encoding every R with a
+    # single inversion
+    assert len(sk) == 32 # seed
+    assert len(pk) == 32
+    h = H(sk[:32])
+    a_bytes, inter = h[:32], h[32:]
+    a = bytes_to_clamped_scalar(a_bytes)
+    rs = [Hint(inter + m) for m in ms]
+    Rs_bytes = elements_to_bytes([Base.scalarmult(r) for r in rs])
+    sigs = []
+    for (m, r, R_bytes) in zip(ms, rs, Rs_bytes):
+        S = r + Hint(R_bytes + pk + m) * a
+        sigs.append(R_bytes + scalar_to_bytes(S))
+    return sigs
+
+class TableCache(LRUCache):
+    """Bounded LRU from 32-byte verifying keys to the precomputed
+    ElementTable of their point, so checkvalid() on a recurring key skips
+    decoding it and building its table. The size is the tables' approximate
+    memory in bytes (see LRUCache)."""
+    def __init__(self, max_bytes=TABLE_CACHE_BYTES):
+        LRUCache.__init__(self, max_bytes, lambda table: table.nbytes)
+
+table_cache = TableCache()
+
+def checkvalid(s, m, pk, table=None):
+    # table is pk's own ElementTable, else the shared caches are used
     if len(s) != 64: raise Exception("signature length is wrong")
     if len(pk) != 32: raise Exception("public-key length is wrong")
+    pk = bytes(pk) # the caches need a hashable key
     R = bytes_to_element(s[:32])
-    A = bytes_to_element(pk)
+    if table is None:
+        table = table_cache.get(pk)
+    if table is None:
+        table = bytes_to_element_cached(pk).precompute()
+        table_cache.put(pk, table)
     S = bytes_to_scalar(s[32:])
     h = Hint(s[:32] + pk + m)
-    v1 = Base.scalarmult(S)
-    v2 = R.add(A.scalarmult(h))
-    return v1==v2
+    # S*B - h*A == R, with -h*A as (L-h)*A since A is in the subgroup
+    v = table.double_scalarmult(S, -h)
+    return extended_equal(v, R.XYTZ)
 
-# wrappers
+def _check_decoded(R, A, S, h):
+    # S*B == R + h*A, checked as S*B - h*A == R with one shared chain of
+    # doublings and compared in projective coordinates
+    v = double_scalarmult_element(S % L, negate_extended(A.XYTZ), h % L)
+    return extended_equal(v, R.XYTZ)
 
-import os
+def _check_batch(entries):
+    # with random 128-bit z_i, sum(z_i*(S_i*B - R_i - h_i*A_i)) == Zero holds
+    # for a batch containing a bad signature with probability about 2**-128
+    terms = []
+    s_sum = 0
+    for (R, A, S, h) in entries:
+        z = int(binascii.hexlify(os.urandom(16)), 16)
+        s_sum += z*S
+        terms.append((z, negate_extended(R.XYTZ)))
+        terms.append((z*h % L, negate_extended(A.XYTZ)))
+    terms.append((s_sum % L, Base.XYTZ))
+    return is_extended_zero(multiscalarmult_extended(terms))
+
+def verify_batch(items):
+    """Check many (sig, msg, pk) signatures at once, returning a list with
+    True for each valid one and False for each invalid one (including
+    malformed signatures and keys). A failing batch is bisected to find the
+    bad signatures."""
+    results = [False] * len(items)
+    wellformed = [i for i, (s, m, pk) in enumerate(items)
+                  if len(s) == 64 and len(pk) == 32]
+    # keys index the caches, so bytearray/memoryview keys become bytes
+    keys = dict((i, bytes(items[i][2])) for i in wellformed)
+    # keys with a cached table or element need no decoding, the rest
+    # share one pass
+    cached = {}
+    uncached = []
+    for i in wellformed:
+        pk = keys[i]
+        if pk in cached:
+            continue
+        table = table_cache.get(pk)
+        A = table.element if table is not None else element_cache.get(pk)
+        cached[pk] = A
+        if A is None:
+            uncached.append(pk)
+    points = bytes_to_elements([items[i][0][:32] for i in wellformed] +
+                               uncached)
+    for (pk, A) in zip(uncached, points[len(wellformed):]):
+        cached[pk] = A
+        if A is not None:
+            element_cache.put(pk, A)
+    decoded = []
+    for (n, i) in enumerate(wellformed):
+        (s, m) = items[i][:2]
+        pk = keys[i]
+        R = points[n]
+        A = cached[pk]
+        if R is None or A is None:
+            continue
+        decoded.append((i, (R, A, bytes_to_scalar(s[32:]), Hint(s[:32] + pk + m))))
+    pending = [decoded]
+    while pending:
+        group = pending.pop()
+        if not group:
+            continue
+        if len(group) == 1:
+            (i, entry) = group[0]
+            results[i] = _check_decoded(*entry)
+        elif _check_batch([entry for (i, entry) in group]):
+            for (i, entry) in group:
+                results[i] = True
+        else:
+            half = len(group) // 2
+            pending.append(group[:half])
+            pending.append(group[half:])
+    return results
+
+# wrappers
 
 def create_signing_key():
     seed = os.urandom(32)
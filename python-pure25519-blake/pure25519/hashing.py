@@ -0,0 +1,44 @@
+import os, hashlib, timeit
+
+# Every BLAKE2b user (eddsa.H/Hint, basic.password_to_scalar, the DH and
+# SPAKE2 KDFs, and pyrai's PoW and address code) imports blake2b from here,
+# so they all share whichever implementation is fastest on this machine.
+# The choice is made once at import time by timing each available backend
+# on a 40-byte input (the size of a PoW attempt). Set PURE25519_BLAKE2B to
+# a backend name to skip the timing and force one.
+
+def _available():
+    found = {}
+    if hasattr(hashlib, "blake2b"): # python >= 3.6
+        found["hashlib"] = hashlib.blake2b
+    try:
+        import pyblake2
+    except ImportError:
+        pass
+    else:
+        found["pyblake2"] = pyblake2.blake2b
+    return found
+
+BACKENDS = _available()
+if not BACKENDS:
+    raise ImportError("no BLAKE2b implementation found: use python >= 3.6 "
+                      "or install pyblake2")
+
+def _cost(impl):
+    data = b"\x00"*40
+    return min(timeit.repeat(lambda: impl(data, digest_size=8).digest(),
+                             number=1000, repeat=3))
+
+def _select():
+    forced = os.environ.get("PURE25519_BLAKE2B")
+    if forced:
+        if forced not in BACKENDS:
+            raise ImportError("PURE25519_BLAKE2B=%s is not available (have: %s)"
+                              % (forced, ", ".join(sorted(BACKENDS))))
+        return forced
+    if len(BACKENDS) == 1:
+        return list(BACKENDS)[0]
+    return min(sorted(BACKENDS), key=lambda name: _cost(BACKENDS[name]))
+
+BACKEND = _select() # name of the active implementation
+blake2b = BACKENDS[BACKEND]
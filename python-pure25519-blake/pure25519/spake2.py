@@ -1,5 +1,5 @@
 from hashlib import sha256
-from pyblake2 import blake2b
+from pure25519.hashing import blake2b
 from pure25519.basic import (arbitrary_element, bytes_to_element, Base,
                              random_scalar, password_to_scalar)
 
@@ -57,6 +57,9 @@ def run():
     S23 = "e=basic.bytes_to_element(P)"
     S24 = "e=basic.arbitrary_element(b'seed')"
     S25 = "e.scalarmult(si)"
+    S26 = "basic.scalarmult_element(e.XYTZ, si)"
+    S27 = "basic.scalarmult_element_safe_slow(e.XYTZ, si)"
+    S28 = "basic.scalarmult_element_wnaf(e.XYTZ, si)"
 
     print("speed_basic")
     if 1:
@@ -86,9 +89,29 @@ def run():
     if 1:
         p("bytes_to_unknown_group_element", [S1,S2,S3], S22)
         p("bytes_to_element", [S1,S2,S3], S23)
+        p("bytes_to_element_cached", [S1,S2,S3], "basic.bytes_to_element_cached(P)")
         p("arbitrary_element", [S1], S24)
         p("scalarmult(unknown-medium)", [S1,S2,S3,S22,S5medium,S6], S25)
         p("scalarmult(medium)", [S1,S2,S3,S23,S5medium,S6], S25)
+        p("scalarmult_element (recursive)", [S1,S2,S3,S23,S5medium,S6], S26)
+        p("scalarmult_element_safe_slow", [S1,S2,S3,S23,S5medium,S6], S27)
+        p("scalarmult_element_wnaf", [S1,S2,S3,S23,S5medium,S6], S28)
+    if 1:
+        # 100 encodings decoded one at a time or sharing one inversion
+        S32 = "strings=[basic.Base.scalarmult(i+1).to_bytes() for i in range(100)]"
+        p("decodepoint x100", [S1,S32], "[basic.decodepoint(s) for s in strings]")
+        p("decodepoints(100)", [S1,S32], "basic.decodepoints(strings)")
+        p("bytes_to_element x100", [S1,S32], "[basic.bytes_to_element(s) for s in strings]")
+        p("bytes_to_elements(100)", [S1,S32], "basic.bytes_to_elements(strings)")
+    if 1:
+        # the cost per term falls as the terms share more of the work
+        S29 = "import random; es=[basic.arbitrary_element(b'%d' % i) for i in range(1024)]"
+        S30 = "terms=[(random.randrange(basic.L), e) for e in es[:%d]]"
+        S31 = "basic.multiscalarmult(terms)"
+        for n in (2, 4, 8, 16, 32, 64, 128, 256, 512, 1024):
+            t = min([do([S1,S29,S30 % n], S31) for i in range(3)])
+            print("%-32s: %s (%s/term)" % ("multiscalarmult(n=%d)" % n,
+                                           abbrev(t), abbrev(t/n)))
 
 if __name__ == "__main__":
     run()
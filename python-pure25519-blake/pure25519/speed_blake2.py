@@ -0,0 +1,46 @@
+import timeit
+
+def do(setup_statements, statement):
+    # extracted from timeit.py
+    t = timeit.Timer(stmt=statement,
+                     setup="\n".join(setup_statements))
+    # determine number so that 0.2 <= total time < 2.0
+    for i in range(1, 10):
+        number = 10**i
+        x = t.timeit(number)
+        if x >= 0.2:
+            break
+    return x / number
+
+def abbrev(t):
+    if t > 1.0:
+        return "%.3fs" % t
+    if t > 1e-3:
+        return "%.2fms" % (t*1e3)
+    if t > 1e-6:
+        return "%.2fus" % (t*1e6)
+    return "%.2fns" % (t*1e9)
+
+def p(name, setup_statements, statements):
+    t = sorted([do(setup_statements, statements) for i in range(3)])
+    print("%-32s: %s (%s)" % (name,
+                             abbrev(min(t)),
+                             " ".join([abbrev(s) for s in t])))
+
+def run():
+    from pure25519 import hashing
+    S2 = "pow_input = b'\\x00'*40"
+    S3 = "seed = b'\\x00'*32"
+    S4 = "blake2b(pow_input, digest_size=8).digest()" # pyrai PoW attempt
+    S5 = "blake2b(seed, digest_size=32).digest()" # pyrai seed_account
+    S6 = "blake2b(seed).digest()" # eddsa.H
+
+    print("speed_blake2 (active backend: %s)" % hashing.BACKEND)
+    for name in sorted(hashing.BACKENDS):
+        S1 = "from pure25519.hashing import BACKENDS; blake2b = BACKENDS[%r]" % name
+        p("%s pow (40B -> 8B)" % name, [S1,S2], S4)
+        p("%s seed (32B -> 32B)" % name, [S1,S3], S5)
+        p("%s H (32B -> 64B)" % name, [S1,S3], S6)
+
+if __name__ == "__main__":
+    run()
@@ -1,4 +1,4 @@
-import timeit
+import time, timeit
 
 def do(setup_statements, statement):
     # extracted from timeit.py
@@ -41,7 +41,55 @@ def run():
     S7 = "eddsa.checkvalid(sig, msg, vk.vk_s)"
 
     p("Hint", [S5], S6)
+    # the same key again and again is served from eddsa.table_cache
     p("checkvalid", [S1,S2,S3,S5], S7)
+    p("checkvalid (no table)", [S1,S2,S3,S5], "eddsa.table_cache.clear(); " + S7)
+    p("checkvalid (new key)", [S1,S2,S3,S5],
+      "eddsa.table_cache.clear(); eddsa.element_cache.clear(); " + S7)
+
+    # Base.scalarmult uses the fixed-base table, Element(Base.XYTZ) is the
+    # same point without it
+    S8 = "from pure25519.basic import Base, Element, base_table; base_table()"
+    S9 = "s = 2**252 + 0x1234567890abcdef1234567890abcdef"
+    S10 = "Base.scalarmult(s)"
+    S11 = "Element(Base.XYTZ).scalarmult(s)"
+    p("B*s (table)", [S8, S9], S10)
+    p("B*s (generic)", [S8, S9], S11)
+
+    # 100 public keys, each encoded on its own or with one shared inversion
+    S12 = "seeds = [bytes([i])*32 for i in range(100)]"
+    S13 = "[eddsa.publickey(seed) for seed in seeds]"
+    S14 = "eddsa.publickey_many(seeds)"
+    p("publickey x100", [S5, S12], S13)
+    p("publickey_many(100)", [S5, S12], S14)
+
+    batch()
+
+def batch(sizes=(8, 64, 512, 4096)):
+    # one pass each, since the larger batches take many seconds: the whole
+    # batch through verify_batch versus checkvalid on every signature, each
+    # starting from empty key caches
+    from pure25519 import eddsa
+    def clear_caches():
+        eddsa.table_cache.clear()
+        eddsa.element_cache.clear()
+    for n in sizes:
+        items = []
+        for i in range(n):
+            sk = eddsa.create_signing_key()
+            msg = b"message %d" % i
+            items.append((eddsa.sign(sk, msg), msg, eddsa.create_verifying_key(sk)))
+        clear_caches()
+        start = time.time()
+        assert all(eddsa.verify_batch(items))
+        t_batch = time.time() - start
+        clear_caches()
+        start = time.time()
+        assert all([eddsa.checkvalid(s, m, pk) for (s, m, pk) in items])
+        t_single = time.time() - start
+        print("%12s: %s/sig batch, %s/sig checkvalid (%.2fx)"
+              % ("batch %d" % n, abbrev(t_batch/n), abbrev(t_single/n),
+                 t_single/t_batch))
 
 if __name__ == "__main__":
     run()
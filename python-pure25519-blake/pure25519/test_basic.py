@@ -5,7 +5,16 @@ from pure25519.basic import (Q, L, B, ElementOfUnknownGroup,
                              arbitrary_element, password_to_scalar,
                              bytes_to_element, bytes_to_unknown_group_element,
                              _add_elements_nonunfied, add_elements, encodepoint,
-                             xform_extended_to_affine, xform_affine_to_extended)
+                             xform_extended_to_affine, xform_affine_to_extended,
+                             radix16_signed, wnaf, scalarmult_element_wnaf,
+                             scalarmult_element_safe_slow,
+                             double_scalarmult_element, extended_equal,
+                             multiscalarmult, _straus_extended,
+                             _pippenger_extended, inv, inv_many,
+                             encodepoints_extended, elements_to_bytes,
+                             decodepoint, decodepoints, bytes_to_elements,
+                             NotOnCurve, ElementTable, LRUCache,
+                             element_cache, bytes_to_element_cached)
 from pure25519.basic import Base, Element, Zero
 from pure25519.slow_basic import (slow_add_affine, scalarmult_affine,
                                   scalarmult_affine_to_extended)
@@ -71,6 +80,152 @@ class Basic(unittest.TestCase):
                 x3 = Element(xform_affine_to_extended(sm2(B, i+j)))
                 self.assertElementsEqual(x1, x3, (x1,x3,i,j))
 
+    def test_scalarmult_base(self):
+        # Base.scalarmult uses the precomputed table, a plain Element with
+        # the same coordinates uses the generic double-and-add
+        generic = Element(Base.XYTZ)
+        scalars = [0, 1, 2, 7, 8, 9, 15, 16, 17, 2**252, 16**63, L-1, L, L+1, -1]
+        scalars.extend(random.randrange(2*L) for i in range(50))
+        for s in scalars:
+            self.assertElementsEqual(Base.scalarmult(s), generic.scalarmult(s), s)
+
+    def test_scalarmult_wnaf(self):
+        # compare against the recursive double-and-add, for a subgroup
+        # element, an element of order 8*L, Zero and the order-2 point
+        points = [arbitrary_element(b"wnaf").XYTZ,
+                  bytes_to_unknown_group_element(b"\x37" + b"\x00"*31).XYTZ,
+                  xform_affine_to_extended((0,1)),
+                  xform_affine_to_extended((0,-1))]
+        scalars = list(range(40)) + [L-2, L-1, L, L+1, 8*L, 2**255-1]
+        scalars.extend(random.randrange(8*L) for i in range(20))
+        for pt in points:
+            for n in scalars:
+                self.assertBytesEqual(
+                    encodepoint(xform_extended_to_affine(scalarmult_element_wnaf(pt, n))),
+                    encodepoint(xform_extended_to_affine(scalarmult_element_safe_slow(pt, n))),
+                    n)
+
+    def test_double_scalarmult(self):
+        P = arbitrary_element(b"straus")
+        U = bytes_to_unknown_group_element(b"\x37" + b"\x00"*31)
+        pairs = [(0, 0), (0, 1), (1, 0), (L-1, L-1), (2**252, 3)]
+        pairs.extend((random.randrange(L), random.randrange(L)) for i in range(20))
+        for a, b in pairs:
+            for pt in (P, U):
+                expected = Base.scalarmult(a).add(pt.scalarmult(b))
+                got = ElementOfUnknownGroup(double_scalarmult_element(a, pt.XYTZ, b))
+                self.assertElementsEqual(got, expected, (a, b))
+                self.assertTrue(extended_equal(got.XYTZ, expected.XYTZ))
+        self.assertFalse(extended_equal(P.XYTZ, Base.XYTZ))
+
+    def test_multiscalarmult(self):
+        points = [arbitrary_element(b"msm%d" % i) for i in range(5)]
+        U = bytes_to_unknown_group_element(b"\x37" + b"\x00"*31)
+        def naive(terms):
+            total = Zero
+            for (s, e) in terms:
+                total = total.add(e.scalarmult(s))
+            return total
+        self.assertIs(multiscalarmult([]), Zero)
+        self.assertIs(multiscalarmult([(0, Base), (5, Zero)]), Zero)
+        self.assertIs(multiscalarmult([(1, Base), (L-1, Base)]), Zero)
+        # Zero terms do not take the result out of the subgroup
+        got = multiscalarmult([(3, Base), (5, Zero)])
+        self.assertIsInstance(got, Element)
+        self.assertElementsEqual(got, Base.scalarmult(3))
+        self.assertElementsEqual(multiscalarmult([(-1, Base), (1, Zero)]),
+                                 Base.scalarmult(L-1))
+        terms = [(random.randrange(L), e) for e in points]
+        got = multiscalarmult(terms)
+        self.assertIsInstance(got, Element)
+        self.assertElementsEqual(got, naive(terms))
+        terms.append((L+3, U)) # not reduced mod L outside the subgroup
+        got = multiscalarmult(terms)
+        self.assertNotIsInstance(got, Element)
+        self.assertElementsEqual(got, naive(terms))
+        self.assertRaises(TypeError, multiscalarmult, [(Base, Base)])
+
+        # both methods, across window widths, agree with each other
+        terms = [(random.randrange(L), e.XYTZ) for e in points + [U]]
+        terms += [(1, Base.XYTZ), (2**255-1, U.XYTZ), (L-1, Base.XYTZ)]
+        expected = _straus_extended(terms)
+        for c in range(1, 10):
+            self.assertTrue(extended_equal(_pippenger_extended(terms, c),
+                                           expected), c)
+
+    def test_encode_many(self):
+        values = [1, 2, Q-1] + [random.randrange(1, Q) for i in range(20)]
+        self.assertEqual(inv_many(values), [inv(v) for v in values])
+        self.assertEqual(inv_many([]), [])
+        U = bytes_to_unknown_group_element(b"\x37" + b"\x00"*31)
+        elements = [Base, Zero, U] + [Base.scalarmult(random.randrange(L)).add(U)
+                                      for i in range(10)]
+        self.assertEqual(elements_to_bytes(elements),
+                         [e.to_bytes() for e in elements])
+        # points that are not in Z=1 form encode the same way
+        pts = [add_elements(e.XYTZ, Base.XYTZ) for e in elements]
+        self.assertEqual(encodepoints_extended(pts),
+                         [encodepoint(xform_extended_to_affine(pt)) for pt in pts])
+
+    def test_precompute(self):
+        P = arbitrary_element(b"table")
+        for w in (2, 5, 6, 8):
+            table = P.precompute(w)
+            self.assertTrue(isinstance(table, ElementTable))
+            self.assertEqual(len(table.odd_niels), 1 << (w-2))
+            for a, b in [(0, 0), (1, 0), (0, 1), (L-1, L+5)] + [
+                (random.randrange(L), random.randrange(L)) for i in range(5)]:
+                expected = Base.scalarmult(a).add(P.scalarmult(b))
+                got = table.double_scalarmult(a, b)
+                self.assertTrue(extended_equal(got, expected.XYTZ), (w, a, b))
+        self.assertIs(table.scalarmult(L), Zero)
+        self.assertElementsEqual(table.scalarmult(7), P.scalarmult(7))
+        self.assertTrue(table.nbytes > 0)
+
+    def test_element_cache(self):
+        cache = LRUCache(2)
+        cache.put(b"a", 1)
+        cache.put(b"b", 2)
+        self.assertEqual(cache.get(b"a"), 1)
+        cache.put(b"c", 3) # evicts b
+        self.assertEqual((cache.get(b"b"), cache.get(b"c")), (None, 3))
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1,
+                                         "hit_rate": 2/3, "entries": 2,
+                                         "size": 2, "max_size": 2})
+        cache.resize(1)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+        element_cache.clear()
+        b = Base.scalarmult(12345).to_bytes()
+        e = bytes_to_element_cached(b)
+        self.assertTrue(isinstance(e, Element))
+        self.assertIs(bytes_to_element_cached(b), e)
+        self.assertIs(bytes_to_element_cached(bytearray(b)), e)
+        # rejected encodings are not cached and raise every time
+        zero = encodepoint((0,1))
+        for i in range(2):
+            self.assertRaises(ValueError, bytes_to_element_cached, zero)
+        stats = element_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]),
+                         (2, 3, 1))
+
+    def test_wnaf(self):
+        for n in [1, 15, 16, 17, 31, 32, L-1] + [random.randrange(L) for i in range(50)]:
+            e = wnaf(n)
+            self.assertEqual(sum(x << i for i, x in enumerate(e)), n)
+            for i, x in enumerate(e):
+                if x:
+                    self.assertTrue(x % 2 == 1 and -16 < x < 16, (n, e))
+                    self.assertEqual(e[i+1:i+5], [0]*len(e[i+1:i+5]))
+            self.assertTrue(e[-1] > 0)
+
+    def test_radix16_signed(self):
+        for n in [0, 1, 8, 9, 15, 2**252, L-1, 2**255-1] + [random.randrange(L) for i in range(50)]:
+            e = radix16_signed(n)
+            self.assertEqual(len(e), 64)
+            self.assertTrue(all(-8 <= x <= 8 for x in e[:63]), (n, e))
+            self.assertEqual(sum(x*16**i for i, x in enumerate(e)), n)
+
     def test_orders(self):
         # the point (0,1) is the identity, and has order 1
         p0 = xform_affine_to_extended((0,1))
@@ -152,6 +307,36 @@ class Basic(unittest.TestCase):
         p = bytes_to_element(b)
         self.assertTrue(isinstance(p, Element))
 
+    def test_bytes_to_elements(self):
+        U = bytes_to_unknown_group_element(b"\x37" + b"\x00"*31)
+        strings = [encodepoint((0,1)), encodepoint((0,-1%Q)),
+                   b"\x1a" + b"\x00"*31, b"\x02" + b"\x00"*31,
+                   U.to_bytes(), Base.to_bytes(),
+                   b"\xff"*32, b"\x01" + b"\x00"*30 + b"\x80"]
+        for i in range(20):
+            strings.append(Base.scalarmult(random.randrange(L)).to_bytes())
+            strings.append(bytes(random.getrandbits(8) for j in range(32)))
+        points = decodepoints(strings)
+        elements = bytes_to_elements(strings)
+        self.assertEqual(len(elements), len(strings))
+        valid = 0
+        for (s, P, e) in zip(strings, points, elements):
+            try:
+                expected = decodepoint(s)
+            except NotOnCurve:
+                expected = None
+            self.assertEqual(P, expected, s)
+            try:
+                expected = bytes_to_element(s)
+            except (ValueError, NotOnCurve):
+                self.assertIs(e, None, s)
+                continue
+            self.assertTrue(isinstance(e, Element))
+            self.assertElementsEqual(e, expected)
+            valid += 1
+        self.assertTrue(valid >= 22)
+        self.assertEqual(bytes_to_elements([]), [])
+
 
 def element_from_affine(P):
     return Element(xform_affine_to_extended(P))
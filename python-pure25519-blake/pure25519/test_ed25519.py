@@ -258,6 +258,97 @@ class Basic(unittest.TestCase):
         check3("base32", b"sig0-gdl52urk7k2mswtbb672pquagspf36nzhsbwnjppvp4tdyscuosgfsymkrc5nn5rjz6nalfclnqucg7uhoidi3gcayvmloiqyn5dsci")
         check3("hex", b"sig0-30d7dd522afab4c95a610fbfa7c280349e5df9b93c8366a5efabf931e242a3a462cb0c5445d6b7b14e7cd02ca25b61411bf43b90346cc2062ac5b910c37a3909")
 
+    def test_verify_batch(self):
+        from pure25519 import eddsa
+        items = []
+        for i in range(6):
+            sk, vk = ed25519.create_keypair()
+            msg = b"batch message %d" % i
+            items.append((sk.sign(msg), msg, vk))
+        ed25519.VerifyingKey.verify_batch(items)
+        raw_items = [(sig, msg, vk.to_bytes()) for (sig, msg, vk) in items]
+        self.assertEqual(eddsa.verify_batch(raw_items), [True]*6)
+        self.assertEqual(eddsa.verify_batch([]), [])
+        mixed = [(sig, msg, [bytes, bytearray, memoryview][i % 3](pk))
+                 for (i, (sig, msg, pk)) in enumerate(raw_items)]
+        self.assertEqual(eddsa.verify_batch(mixed), [True]*6)
+
+        # a corrupted message, a signature under the wrong key, an
+        # undecodable R and a truncated signature are each singled out
+        bad = list(raw_items)
+        bad[1] = (bad[1][0], bad[1][1]+b"!", bad[1][2])
+        bad[4] = (bad[4][0], bad[4][1], bad[0][2])
+        bad[5] = (b"\xff"*32 + bad[5][0][32:], bad[5][1], bad[5][2])
+        bad.append((bad[0][0][:63], bad[0][1], bad[0][2]))
+        self.assertEqual(eddsa.verify_batch(bad),
+                         [True, False, True, True, False, False, False])
+        with self.assertRaises(ed25519.BadSignatureError) as cm:
+            ed25519.VerifyingKey.verify_batch(bad)
+        self.assertEqual(cm.exception.args[0], [1, 4, 5, 6])
+
+    def test_many(self):
+        from pure25519 import eddsa
+        seeds = [bytes([i])*32 for i in range(5)]
+        pks = eddsa.publickey_many(seeds)
+        self.assertEqual(pks, [eddsa.publickey(seed) for seed in seeds])
+        msgs = [b"", b"one", b"two"*100]
+        sigs = eddsa.signature_many(msgs, seeds[0], pks[0])
+        self.assertEqual(sigs, [eddsa.signature(m, seeds[0], pks[0]) for m in msgs])
+        self.assertEqual(eddsa.publickey_many([]), [])
+
+    def test_table_cache(self):
+        from pure25519 import eddsa
+        from pure25519.basic import Base
+        tables = [Base.scalarmult(i+2).precompute() for i in range(3)]
+        cache = eddsa.TableCache(max_bytes=2*tables[0].nbytes)
+        self.assertIs(cache.get(b"a"), None)
+        cache.put(b"a", tables[0])
+        cache.put(b"b", tables[1])
+        self.assertIs(cache.get(b"a"), tables[0])
+        cache.put(b"c", tables[2]) # evicts b, the least recently used
+        self.assertIs(cache.get(b"b"), None)
+        self.assertIs(cache.get(b"c"), tables[2])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]),
+                         (2, 2, 2))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertTrue(stats["size"] <= stats["max_size"])
+        cache.resize(0)
+        self.assertEqual(cache.stats()["entries"], 0)
+        cache.put(b"a", tables[0])
+        self.assertIs(cache.get(b"a"), None)
+
+        # checkvalid fills the process-wide cache and gives the same answers
+        # from a cached table
+        eddsa.table_cache.clear()
+        sk = b"\x07"*32
+        pk = eddsa.publickey(sk)
+        sig = eddsa.signature(b"msg", sk, pk)
+        for i in range(3):
+            self.assertTrue(eddsa.checkvalid(sig, b"msg", pk))
+            self.assertFalse(eddsa.checkvalid(sig, b"msg!", pk))
+        stats = eddsa.table_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]),
+                         (5, 1, 1))
+        self.assertEqual(eddsa.verify_batch([(sig, b"msg", pk)]*3), [True]*3)
+        self.assertEqual(eddsa.table_cache.stats()["hits"], 6)
+        # keys given as other buffer types share the same cache entry
+        self.assertTrue(eddsa.checkvalid(sig, b"msg", bytearray(pk)))
+        self.assertTrue(eddsa.checkvalid(sig, b"msg", memoryview(pk)))
+        self.assertEqual(eddsa.table_cache.stats()["entries"], 1)
+
+    def test_cached_verifying_key(self):
+        sk, vk = ed25519.create_keypair()
+        sig = sk.sign(b"msg")
+        cached = ed25519.VerifyingKey(vk.to_bytes(), cache=True)
+        self.assertEqual(cached, vk)
+        for i in range(2):
+            cached.verify(sig, b"msg")
+            self.assertRaises(ed25519.BadSignatureError,
+                              cached.verify, sig, b"msg!")
+        self.assertRaises(ValueError, ed25519.VerifyingKey, b"\x01" + b"\x00"*31,
+                          cache=True)
+
 
 if __name__ == '__main__':
     unittest.main()
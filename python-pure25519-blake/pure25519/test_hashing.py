@@ -0,0 +1,26 @@
+import unittest
+import hashlib
+from pure25519 import hashing
+
+class Hashing(unittest.TestCase):
+    def test_backend(self):
+        self.assertIn(hashing.BACKEND, hashing.BACKENDS)
+        self.assertIs(hashing.blake2b, hashing.BACKENDS[hashing.BACKEND])
+
+    def test_backends_agree(self):
+        # every backend must produce standard BLAKE2b output, at the digest
+        # sizes used for PoW (8), checksums (5), seeds (32) and H (64)
+        for name, impl in hashing.BACKENDS.items():
+            for size in (5, 8, 32, 64):
+                for length in (0, 32, 40, 100):
+                    data = bytes(range(length))
+                    h = impl(digest_size=size)
+                    h.update(data[:7])
+                    h.copy().update(b"ignored")
+                    h.update(data[7:])
+                    self.assertEqual(h.digest(),
+                                     hashlib.blake2b(data, digest_size=size).digest(),
+                                     (name, size, length))
+
+if __name__ == '__main__':
+    unittest.main()
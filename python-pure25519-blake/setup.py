@@ -28,7 +28,9 @@ class KnownAnswerTest(Test):
 class Speed(Test):
     description = "run benchmark suite"
     def run(self):
-        from pure25519 import speed_basic, speed_ed25519, speed_dh, speed_spake2
+        from pure25519 import (speed_basic, speed_ed25519, speed_dh,
+                               speed_spake2, speed_blake2)
+        speed_blake2.run()
         speed_basic.run()
         speed_ed25519.run()
         speed_dh.run()
@@ -0,0 +1,464 @@
+import os
+import io
+import json
+import re
+import asyncio
+import shutil
+import sqlite3
+import multiprocessing
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import pyrai
+
+def keys(n):
+	return [bytes([i % 256]) * 32 for i in range(n)] + [os.urandom(32) for i in range(n)]
+
+class Addresses(unittest.TestCase):
+	def test_round_trip(self):
+		accounts = keys(20)
+		addresses = pyrai.account_xrb_many(accounts)
+		self.assertEqual(addresses, [pyrai.account_xrb_bytes(a) for a in accounts])
+		self.assertEqual(pyrai.account_xrb_many(b''.join(accounts)), addresses)
+		self.assertEqual(pyrai.xrb_account_many(addresses), accounts)
+		self.assertEqual(pyrai.xrb_account_many([a.decode() for a in addresses]), accounts)
+		self.assertEqual([pyrai.xrb_account_bytes(a) for a in addresses], accounts)
+		self.assertEqual(pyrai.account_xrb_many([]), [])
+		self.assertEqual(pyrai.xrb_account_many([]), [])
+
+	def test_batches(self):
+		accounts = keys(pyrai.XRB_BATCH // 2 + 7)									# spans more than one batch
+		addresses = pyrai.account_xrb_many(accounts)
+		self.assertEqual(len(addresses), len(accounts))
+		self.assertEqual(addresses[-1], pyrai.account_xrb_bytes(accounts[-1]))
+		self.assertEqual(pyrai.xrb_account_many(addresses), accounts)
+
+	def test_invalid_addresses(self):
+		good = pyrai.account_xrb_bytes(bytes(range(32)))
+		flipped = good[:-1] + (b'1' if good[-1:] != b'1' else b'3')				# checksum mismatch
+		out_of_range = b'xrb_4' + good[5:]											# first character above 3
+		bad = [flipped, out_of_range, good[:-1], good + b'1', b'nano_' + good[4:], good[:10] + b'0' + good[11:], b'']
+		self.assertEqual(pyrai.xrb_account_many(bad + [good]), [None] * len(bad) + [bytes(range(32))])
+		for address in bad:
+			self.assertRaises(ValueError, pyrai.xrb_account_bytes, address)
+		self.assertEqual(pyrai.xrb_account(flipped), False)
+
+	def test_bad_key_lengths(self):
+		k = keys(2)
+		for wrong in (k[0] + b'x', k[0][:31], k[0][:16], b''):
+			self.assertRaises(ValueError, pyrai.account_xrb_many, [k[1], wrong, k[2]])
+		self.assertRaises(ValueError, pyrai.account_xrb_many, b''.join(k) + b'x')
+
+class TempDir(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.mkdtemp()
+		self.path = os.path.join(self.dir, 'file')
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+class Index(TempDir):
+	def test_from_file(self):
+		k = keys(3)
+		with open(self.path, 'w') as f:
+			f.write("%s\n\n%s\n%s\n" % (k[0].hex(), pyrai.account_xrb_bytes(k[1]).decode(), k[2].hex().upper()))
+		index = pyrai.AccountIndex.from_file(self.path)
+		self.assertEqual(len(index), 3)
+		for key in k[:3]:
+			address = pyrai.account_xrb_bytes(key)
+			self.assertEqual(index.key(address), key)
+			self.assertEqual(index.key(address.decode()), key)
+			self.assertEqual(index.address(key), address)
+
+	def test_bad_lines(self):
+		k = keys(3)
+		for bad in (k[1].hex()[:-2], k[1].hex() + 'ab', 'zz' * 32, 'xrb_' + '1' * 60):
+			with open(self.path, 'w') as f:
+				f.write("%s\n%s\n%s\n" % (k[0].hex(), bad, k[2].hex()))
+			with self.assertRaises(ValueError) as cm:
+				pyrai.AccountIndex.from_file(self.path)
+			self.assertIn(bad, str(cm.exception))
+		self.assertRaises(ValueError, pyrai.AccountIndex, [k[0], k[1][:31]])
+
+class Decode(unittest.TestCase):
+	def test_address_cache(self):
+		k = keys(2)
+		addresses = [pyrai.account_xrb_bytes(key) for key in k]
+		cache = pyrai.AddressCache(size=2)
+		self.assertEqual(cache.decode(addresses[0]), k[0])
+		self.assertEqual(cache.decode(addresses[0].decode()), k[0])
+		self.assertEqual(cache.decode(addresses[1]), k[1])
+		self.assertEqual(cache.decode(addresses[2]), k[2])							# evicts addresses[0], the least recently used
+		self.assertEqual(len(cache), 2)
+		self.assertEqual(cache.decode(addresses[0]), k[0])
+		self.assertEqual(cache.stats(), {'hits': 1, 'misses': 4, 'size': 2, 'hit_rate': 0.2})
+		for bad in (addresses[0][:-1], b'xrb_' + b'1' * 60, 'nope'):
+			self.assertRaises(ValueError, cache.decode, bad)
+		self.assertEqual((len(cache), cache.misses), (2, 7))						# misses, but never cached
+		cache.clear()
+		self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'size': 0, 'hit_rate': 0.0})
+		self.assertRaises(ValueError, pyrai.AddressCache, 0)
+
+	def test_index_first(self):
+		k = keys(2)
+		cache = pyrai.AddressCache(size=2, index=pyrai.AccountIndex(k[:2]))
+		for i in range(3):
+			self.assertEqual(cache.decode(pyrai.account_xrb_bytes(k[1])), k[1])
+		self.assertEqual((len(cache), cache.hits, cache.misses), (0, 3, 0))		# served by the index, not cached
+		self.assertEqual(cache.decode(pyrai.account_xrb_bytes(k[2])), k[2])
+		self.assertEqual((len(cache), cache.hits, cache.misses), (1, 3, 1))
+
+ROOT = 'C8E5B875778702445B25657276ABC56AA9910B283537CA438B2CC59B0CF93712'				# previous block of the send in pyrai.test()
+WORK = '266063092558d903'
+
+class Work(TempDir):
+	def pairs(self):
+		# hex (work, root) pairs, one valid at the live threshold and many that are not
+		pairs = [(WORK, ROOT), ('%016x' % (int(WORK, 16) + 1), ROOT), (WORK, '00' * 32)]
+		pairs += [(os.urandom(8).hex(), os.urandom(32).hex()) for i in range(200)]
+		return pairs
+
+	def test_validate_many(self):
+		pairs = self.pairs()
+		expected = bytearray(pyrai.pow_validate(w, r) for w, r in pairs)
+		self.assertEqual(expected[0], 1)
+		raw = [(bytes.fromhex(w)[::-1], bytes.fromhex(r)) for w, r in pairs]
+		self.assertEqual(pyrai.pow_validate_many(raw), expected)
+		self.assertEqual(pyrai.pow_validate_many(b''.join(w + r for w, r in raw)), expected)
+		self.assertRaises(ValueError, pyrai.pow_validate_many, b'x' * (pyrai.POW_RECORD + 1))
+		# an easier threshold matches a direct comparison of the digest
+		easy = pyrai.pow_validate_many(raw, pyrai.BENCH_THRESHOLD)
+		for (w, r), ok in zip(raw, easy):
+			h = pyrai.blake2b(digest_size=8)
+			h.update(w + r)
+			self.assertEqual(ok, int(int.from_bytes(h.digest(), 'little') > pyrai.BENCH_THRESHOLD))
+
+	def test_validate_stream(self):
+		pairs = self.pairs()
+		expected = bytearray(pyrai.pow_validate(w, r) for w, r in pairs)
+		with open(self.path, 'wb') as f:
+			for w, r in pairs: f.write(bytes.fromhex(w)[::-1] + bytes.fromhex(r))
+		with open(self.path, 'rb') as f:
+			chunks = list(pyrai.pow_validate_stream(f, records=64))
+		self.assertEqual([len(c) for c in chunks], [64, 64, 64, len(pairs) - 192])
+		self.assertEqual(b''.join(chunks), expected)
+		with open(self.path, 'ab') as f:
+			f.write(b'x')
+		with open(self.path, 'rb') as f:
+			self.assertRaises(ValueError, list, pyrai.pow_validate_stream(f, records=64))
+
+class Search(unittest.TestCase):
+	def test_pow_search(self):
+		root = bytes.fromhex(ROOT)
+		nonces = range(1000, 1000 + 4 * 65536)
+		passed = pyrai.pow_validate_many([(n.to_bytes(8, 'little'), root) for n in nonces], pyrai.BENCH_THRESHOLD)
+		first = nonces[passed.index(1)]
+		self.assertEqual(pyrai.pow_search(root, 1000, len(nonces), pyrai.BENCH_THRESHOLD), first)
+		self.assertEqual(pyrai.pow_search(root, first, 1, pyrai.BENCH_THRESHOLD), first)
+		self.assertIsNone(pyrai.pow_search(root, 1000, first - 1000, pyrai.BENCH_THRESHOLD))		# stops just short of it
+		self.assertIsNone(pyrai.pow_search(root, first, 0, pyrai.BENCH_THRESHOLD))
+		self.assertEqual(pyrai.pow_search(root, int(WORK, 16), 1), int(WORK, 16))
+
+	def test_nonce_space(self):
+		root = bytes.fromhex(ROOT)
+		top = pyrai.NONCE_SPACE - 1
+		self.assertEqual(pyrai.pow_search(root, top, 10, 0), top)					# any nonzero digest passes
+		self.assertIsNone(pyrai.pow_search(root, top - 2, 10, top))				# nothing passes, and nothing past top is packed
+		self.assertIsNone(pyrai.pow_search(root, pyrai.NONCE_SPACE, 10, 0))
+
+	def test_generate_sequential(self):
+		with mock.patch.object(pyrai.random, 'getrandbits', return_value=int(WORK, 16) - 5):
+			self.assertEqual(pyrai.pow_generate_sequential(ROOT), WORK)				# walks up from a random origin to the known work
+
+class Store(TempDir):
+	def test_prune(self):
+		db = sqlite3.connect(self.path)
+		db.execute("CREATE TABLE work (root TEXT PRIMARY KEY, work TEXT NOT NULL)")
+		db.executemany("INSERT INTO work VALUES (?, ?)", [(ROOT, WORK), ('00' * 32, WORK), ('11' * 32, 'not hex')])
+		db.commit()
+		db.close()
+		store = pyrai.WorkStore(self.path)
+		self.assertEqual(store.dropped, 2)											# stale and corrupt entries go on open
+		self.assertEqual(len(store), 1)
+		self.assertEqual(store.get(ROOT.lower()), WORK)
+		self.assertEqual(store.prune(), 0)
+		store.put('22' * 32, WORK)
+		store.put('33' * 32, 'zz')
+		self.assertEqual(store.prune(), 2)
+		self.assertEqual(len(store), 1)
+		store.put('22' * 32, WORK)
+		self.assertIsNone(store.get('22' * 32))									# re-checked on read, and deleted
+		self.assertEqual(len(store), 1)
+		calls = []
+		self.assertEqual(store.generate(ROOT, lambda root: calls.append(root)), WORK)
+		self.assertEqual(calls, [])
+		store.close()
+		store = pyrai.WorkStore(self.path)
+		self.assertEqual((store.dropped, len(store)), (0, 1))
+		store.close()
+
+class Cache(TempDir):
+	def test_load_drops_bad_entries(self):
+		with open(self.path, 'w') as f:
+			json.dump({ROOT: WORK, '00' * 32: WORK, '11' * 32: 'not hex', '22' * 32: 5}, f)
+		cache = pyrai.WorkCache(path=self.path)
+		self.assertEqual(len(cache), 1)
+		self.assertEqual(cache.get(ROOT, block=False), WORK)
+
+	def test_background(self):
+		calls = []
+		release = threading.Event()
+		def generate(frontier):
+			calls.append(frontier)
+			if frontier == 'AA': release.wait()
+			if frontier == 'BAD': raise RuntimeError("no work")
+			return frontier.lower() + '-work'
+		cache = pyrai.WorkCache(size=2, generate=generate)
+		self.assertIsNone(cache.get('ff', block=False))								# not scheduled without block
+		self.assertEqual(calls, [])
+		cache.precompute('ff')
+		cache.precompute('FF')
+		self.assertEqual(cache.get('FF'), 'ff-work')
+		self.assertIsNone(cache.get('aa', timeout=0.05))							# still being generated
+		release.set()
+		self.assertEqual(cache.get('aa', timeout=5), 'aa-work')
+		self.assertIsNone(cache.get('bad'))										# a failed generate drops the frontier
+		self.assertEqual(cache.get('cc'), 'cc-work')								# and the thread carries on
+		self.assertEqual(len(cache), 2)
+		self.assertNotIn('ff', cache)												# least recently used went first
+		self.assertEqual(cache.get('aa', block=False), 'aa-work')					# now more recent than cc
+		cache.put('dd', 'dd-work')
+		self.assertEqual(('aa' in cache, 'cc' in cache, 'dd' in cache), (True, False, True))
+		self.assertEqual(calls, ['FF', 'AA', 'BAD', 'CC'])
+		cache.discard('aa')
+		self.assertNotIn('aa', cache)
+		cache.stop()
+		self.assertRaises(ValueError, pyrai.WorkCache, 0)
+
+	def test_store(self):
+		calls = []
+		store = pyrai.WorkStore(os.path.join(self.dir, 'store'))
+		store.put(ROOT, WORK)
+		cache = pyrai.WorkCache(generate=lambda root: calls.append(root) or '1234', store=store)
+		self.assertEqual(cache.get(ROOT.lower()), WORK)							# found in the store, not generated
+		self.assertEqual(cache.get('22' * 32), '1234')
+		self.assertEqual(calls, ['22' * 32])
+		self.assertEqual(len(store), 2)											# generated work is recorded in the store
+		cache.stop()
+		store.close()
+
+	def test_persistence(self):
+		cache = pyrai.WorkCache(path=self.path, generate=lambda root: WORK)
+		self.assertEqual(cache.get(ROOT), WORK)
+		cache.put('22' * 32, WORK)
+		cache.discard('22' * 32)
+		cache.stop()
+		self.assertEqual(list(pyrai.WorkCache(path=self.path)._work), [ROOT])
+		cache = pyrai.WorkCache(path=os.path.join(self.dir, 'missing', 'file'), generate=lambda root: WORK)
+		self.assertEqual(cache.get(ROOT), WORK)									# saving fails, the work is still handed out
+		self.assertEqual(cache.get('22' * 32), WORK)
+		self.assertTrue(cache._thread.is_alive())
+		cache.stop()
+
+SEED = '9F1D53E732E48F25F94711D5B22086778278624F715D9B2BEC8FB81134E7C904'			# the seed used by pyrai.test()
+
+class Seeds(unittest.TestCase):
+	def expected(self, start, stop):
+		return [(i,) + tuple(pyrai.seed_account(SEED, i)) for i in range(start, stop)]
+
+	def test_seed_accounts(self):
+		expected = self.expected(5, 40)
+		self.assertEqual(list(pyrai.seed_accounts(SEED, 5, 40, chunk=7)), expected)
+		self.assertEqual(list(pyrai.seed_accounts(bytes.fromhex(SEED), 5, 40, workers=2, chunk=7)), expected)
+		with multiprocessing.Pool(2) as pool:
+			self.assertEqual(list(pyrai.seed_accounts(SEED, 5, 40, 2, 7, pool)), expected)
+		self.assertEqual(list(pyrai.seed_accounts(SEED, 3, 3)), [])
+
+	def test_seed_accounts_into(self):
+		expected = self.expected(10, 30)
+		records = b''.join(private + public for index, private, public in expected)
+		for workers in (None, 2):
+			buffer = bytearray(64 * 20 + 5)
+			self.assertEqual(pyrai.seed_accounts_into(SEED, 10, 30, buffer, workers, chunk=6), 20)
+			self.assertEqual(bytes(buffer[:64 * 20]), records)
+			self.assertEqual(bytes(buffer[64 * 20:]), bytes(5))
+		self.assertRaises(ValueError, pyrai.seed_accounts_into, SEED, 10, 30, bytearray(64 * 19))
+
+class Table(TempDir):
+	def test_reopen(self):
+		with pyrai.AccountTable(self.path, SEED) as table:
+			self.assertEqual(len(table), 0)
+			self.assertEqual(table.extend(20), 20)
+			self.assertEqual(table.extend(10), 0)
+		with pyrai.AccountTable(self.path, bytes.fromhex(SEED)) as table:
+			self.assertEqual(len(table), 20)
+			self.assertEqual(table.extend(30, workers=2), 10)
+			for i in (0, 19, 29):
+				self.assertEqual(bytes(table.public(i)), pyrai.seed_account(SEED, i)[1])
+			self.assertEqual(table.address(29), pyrai.account_xrb_bytes(pyrai.seed_account(SEED, 29)[1]))
+			self.assertRaises(IndexError, table.public, 30)
+
+	def test_truncated_record(self):
+		with pyrai.AccountTable(self.path, SEED) as table:
+			table.extend(5)
+		with open(self.path, 'ab') as f:
+			f.write(b'half a key')													# as left by a crash mid-write
+		with pyrai.AccountTable(self.path, SEED) as table:
+			self.assertEqual(len(table), 5)
+			table.extend(6)
+			self.assertEqual(bytes(table.public(5)), pyrai.seed_account(SEED, 5)[1])
+
+	def test_wrong_seed(self):
+		with pyrai.AccountTable(self.path, SEED) as table:
+			table.extend(3)
+		self.assertRaises(ValueError, pyrai.AccountTable, self.path, '00' * 32)
+		with open(self.path, 'rb') as f:
+			data = f.read()
+		with pyrai.AccountTable(self.path, SEED) as table:						# the refused open left the file alone
+			self.assertEqual(len(table), 3)
+		with open(self.path, 'rb') as f:
+			self.assertEqual(f.read(), data)
+
+class Finder(TempDir):
+	def test_find(self):
+		public = pyrai.seed_account(SEED, 70)[1]
+		for workers in (None, 2):
+			finder = pyrai.AccountFinder(SEED, chunk=16)
+			self.assertIsNone(finder.find(public, search=50, workers=workers))
+			self.assertEqual(finder.derived, 50)
+			self.assertEqual(finder.find(pyrai.account_xrb_bytes(public), search=200, workers=workers), 70)
+			self.assertTrue(70 < finder.derived < 200)								# stopped soon after finding it
+			self.assertEqual(finder.find(public.hex()), 70)
+
+	def test_find_with_table(self):
+		public = pyrai.seed_account(SEED, 40)[1]
+		with pyrai.AccountTable(self.path, SEED) as table:
+			finder = pyrai.AccountFinder(SEED, table, chunk=16)
+			self.assertEqual(finder.find(public, search=500, workers=2), 40)
+			self.assertEqual(len(table), 48)										# up to the end of the chunk holding it
+		with pyrai.AccountTable(self.path, SEED) as table:
+			self.assertEqual(pyrai.AccountFinder(SEED, table).find(public), 40)
+
+class Parallel(unittest.TestCase):
+	def test_stop_event_is_reusable(self):
+		stop = threading.Event()
+		for i in range(2):
+			work = pyrai.pow_generate_parallel(ROOT, 1, pyrai.BENCH_THRESHOLD, stop)
+			self.assertIsNotNone(work)
+			self.assertFalse(stop.is_set())
+			self.assertEqual(pyrai.pow_validate_many([(bytes.fromhex(work)[::-1], bytes.fromhex(ROOT))], pyrai.BENCH_THRESHOLD), b'\x01')
+		stop.set()
+		self.assertIsNone(pyrai.pow_generate_parallel(ROOT, 1, pyrai.POW_THRESHOLD, stop))
+
+class Server(unittest.TestCase):
+	def test_bad_requests(self):
+		server = pyrai.WorkServer(workers=1)
+		async def run():
+			replies = []
+			for request in [{'action': 'work_generate', 'hash': ROOT, 'difficulty': 5},
+							{'action': 'work_generate', 'hash': ROOT, 'difficulty': 'ffff'},
+							{'action': 'work_generate', 'hash': ROOT[:-2]},
+							{'action': 'work_generate', 'hash': 'zz' + ROOT[2:]},
+							{'action': 'work_generate'},
+							{'action': 'work_cancel', 'hash': 5},
+							[ROOT], 'work_generate']:
+				replies.append(await server.handle(request))
+			replies.append(await server.handle({'action': 'work_generate', 'hash': ROOT, 'difficulty': '%016x' % pyrai.BENCH_THRESHOLD}))
+			await server.close()
+			return replies
+		replies = asyncio.run(run())
+		for reply in replies[:-1]:
+			self.assertTrue(reply['error'].startswith('Bad request'), reply)
+		self.assertEqual(replies[-1]['difficulty'], '%016x' % pyrai.BENCH_THRESHOLD)
+		self.assertTrue(pyrai.pow_validate_many([(bytes.fromhex(replies[-1]['work'])[::-1], bytes.fromhex(ROOT))], pyrai.BENCH_THRESHOLD)[0])
+
+class Vanity(TempDir):
+	def check(self, match):
+		private, public = pyrai.seed_account(match['seed'], 0)
+		self.assertEqual(private.hex().upper(), match['private'])
+		self.assertEqual(public.hex().upper(), match['public'])
+		self.assertEqual(pyrai.account_xrb_bytes(public).decode(), match['address'])
+
+	def test_expected(self):
+		self.assertEqual(pyrai.vanity_expected('xrb_'), 1.0)
+		self.assertEqual(pyrai.vanity_expected('xrb_1'), 2.0)
+		self.assertEqual(pyrai.vanity_expected(b'3ab'), 2.0 * 32 ** 2)
+		for bad in ('xrb_2', 'xrb_4', 'xrb_a', 'xrb_1l', 'xrb_10', 'xrb_1V', 'xrb_1' + '1' * 60):
+			self.assertRaises(ValueError, pyrai.vanity_expected, bad)
+		self.assertRaises(ValueError, pyrai.vanity_search, 'xrb_2', workers=1)
+
+	def test_batch(self):
+		base = bytes(32)
+		found = pyrai._vanity_batch(base, 10, 8, b'xrb_', False)					# every address matches the bare prefix
+		self.assertEqual([f[0] for f in found], list(range(10, 18)))
+		for counter, seed, private, public, address in found:
+			self.assertEqual(pyrai.seed_account(seed.hex(), 0), (private, public))
+			self.assertEqual(pyrai.account_xrb_bytes(public), address)
+		self.assertEqual(pyrai._vanity_batch(base, 10, 8, found[3][4].decode()[-8:] + '$', True), [found[3]])
+
+	def test_prefix(self):
+		matches = pyrai.vanity_search('1a', matches=2, workers=1, batch=64)
+		self.assertEqual(len(matches), 2)
+		for match in matches:
+			self.assertTrue(match['address'].startswith('xrb_1a'))
+			self.check(match)
+
+	def test_regex(self):
+		matches = pyrai.vanity_search('^xrb_3.*z$', regex=True, workers=1, batch=64)
+		self.assertEqual(len(matches), 1)
+		self.assertRegex(matches[0]['address'], '^xrb_3.*z$')
+		self.check(matches[0])
+		self.assertRaises(re.error, pyrai.vanity_search, '(', regex=True, workers=1)
+
+	def test_checkpoint(self):
+		first = pyrai.vanity_search('xrb_1b', workers=1, checkpoint=self.path, batch=64)
+		with open(self.path) as f:
+			saved = json.load(f)
+		self.assertEqual((saved['pattern'], saved['regex'], saved['matches'][:1]), ('xrb_1b', False, first))
+		self.assertGreater(saved['counter'], first[0]['counter'])
+		n = len(saved['matches'])													# a batch can hold more matches than asked for
+		more = pyrai.vanity_search('xrb_1b', matches=n + 1, workers=1, checkpoint=self.path, batch=64)
+		self.assertEqual(more[:n], saved['matches'])								# resumed rather than restarted
+		self.assertGreaterEqual(more[n]['counter'], saved['counter'])
+		self.check(more[n])
+		with open(self.path) as f:
+			self.assertEqual(json.load(f)['base'], saved['base'])
+		self.assertEqual(pyrai.vanity_search('xrb_1b', workers=1, checkpoint=self.path), first)	# enough matches already
+		for pattern, regex in (('xrb_1c', False), ('xrb_1b', True)):
+			with self.assertRaises(ValueError):
+				pyrai.vanity_search(pattern, regex, workers=1, checkpoint=self.path)
+
+class Convert(TempDir):
+	def setUp(self):
+		super().setUp()
+		k = keys(4)
+		self.valid = len(k)
+		self.keys = ["%s\n" % key.hex() for key in k] + ["zz\n", "\n", k[0].hex()[:-2] + "\n"]
+		self.addresses = ["%s\n" % pyrai.account_xrb_bytes(key).decode() for key in k] + ["xrb_1\n", "\n", "nope\n"]
+		self.encoded = ''.join(self.addresses[:len(k)]) + '\n' * 3
+		self.decoded = ''.join(key.hex().upper() + '\n' for key in k) + '\n' * 3
+
+	def test_convert_stream(self):
+		for workers in (None, 2):
+			for direction, lines, expected in (('encode', self.keys, self.encoded), ('decode', self.addresses, self.decoded)):
+				out = io.StringIO()
+				stats = pyrai.convert_stream([lines[:5], lines[5:]], out, direction, workers, chunk=3)	# chunks span both inputs
+				self.assertEqual(out.getvalue(), expected)
+				self.assertEqual((stats['lines'], stats['invalid']), (len(lines), 3))
+
+	def test_main(self):
+		inputs = os.path.join(self.dir, 'keys')
+		with open(inputs, 'w') as f:
+			f.writelines(self.keys)
+		self.assertEqual(pyrai.main(['encode', '-q', '-o', self.path, inputs]), 1)
+		with open(self.path) as f:
+			self.assertEqual(f.read(), self.encoded)
+		with open(inputs, 'w') as f:
+			f.writelines(self.addresses[:self.valid])
+		self.assertEqual(pyrai.main(['decode', '-q', '-j', '2', '--chunk', '3', '-o', self.path, inputs]), 0)
+		with open(self.path) as f:
+			self.assertEqual(f.read(), self.decoded[:-3])
+
+if __name__ == '__main__':
+	unittest.main()